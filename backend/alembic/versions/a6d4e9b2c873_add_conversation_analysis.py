@@ -0,0 +1,28 @@
+"""add conversation analysis
+
+Revision ID: a6d4e9b2c873
+Revises: f3c9d8a1b726
+Create Date: 2026-10-17 16:22:48.107245
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d4e9b2c873'
+down_revision: Union[str, None] = 'f3c9d8a1b726'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('conversations', sa.Column('analysis', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    op.add_column('conversations', sa.Column('analysis_message_count', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('conversations', 'analysis_message_count')
+    op.drop_column('conversations', 'analysis')
@@ -0,0 +1,39 @@
+"""add user_progress
+
+Revision ID: b7e2c4a91f30
+Revises: 93ca6e3d013d
+Create Date: 2026-10-17 10:12:41.208315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2c4a91f30'
+down_revision: Union[str, None] = '93ca6e3d013d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Rows are created lazily (and built from daily_tasks) by TaskService;
+    # run `python -m app.jobs.rebuild_progress` to populate them eagerly.
+    op.create_table('user_progress',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('current_streak', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('longest_streak', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('last_completed_date', sa.Date(), nullable=True),
+    sa.Column('total_tasks', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('total_completed', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('weekly_buckets', postgresql.JSONB(astext_type=sa.Text()), server_default='{}', nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_progress')
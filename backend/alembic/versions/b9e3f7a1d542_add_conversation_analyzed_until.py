@@ -0,0 +1,25 @@
+"""add conversation analyzed_until
+
+Revision ID: b9e3f7a1d542
+Revises: a6d4e9b2c873
+Create Date: 2026-10-17 17:03:19.644820
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9e3f7a1d542'
+down_revision: Union[str, None] = 'a6d4e9b2c873'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('conversations', sa.Column('analyzed_until', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('conversations', 'analyzed_until')
@@ -0,0 +1,40 @@
+"""flag analyzed messages
+
+Revision ID: c2a7d5e8f316
+Revises: b9e3f7a1d542
+Create Date: 2026-10-17 18:41:05.227913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2a7d5e8f316'
+down_revision: Union[str, None] = 'b9e3f7a1d542'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('messages', sa.Column('analyzed', sa.Boolean(), server_default='false', nullable=False))
+    op.execute(
+        "UPDATE messages SET analyzed = true FROM conversations "
+        "WHERE messages.conversation_id = conversations.id "
+        "AND conversations.analyzed_until IS NOT NULL "
+        "AND messages.created_at <= conversations.analyzed_until"
+    )
+    op.create_index('ix_messages_conversation_unanalyzed', 'messages', ['conversation_id'], postgresql_where=sa.text('NOT analyzed'))
+    op.drop_column('conversations', 'analyzed_until')
+
+
+def downgrade() -> None:
+    op.add_column('conversations', sa.Column('analyzed_until', sa.DateTime(timezone=True), nullable=True))
+    op.execute(
+        "UPDATE conversations SET analyzed_until = ("
+        "SELECT max(created_at) FROM messages "
+        "WHERE messages.conversation_id = conversations.id AND messages.analyzed)"
+    )
+    op.drop_index('ix_messages_conversation_unanalyzed', table_name='messages', postgresql_where=sa.text('NOT analyzed'))
+    op.drop_column('messages', 'analyzed')
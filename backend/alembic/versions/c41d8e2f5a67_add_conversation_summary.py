@@ -0,0 +1,27 @@
+"""add conversation rolling summary
+
+Revision ID: c41d8e2f5a67
+Revises: b7e2c4a91f30
+Create Date: 2026-10-17 11:03:18.554120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41d8e2f5a67'
+down_revision: Union[str, None] = 'b7e2c4a91f30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('conversations', sa.Column('summary', sa.Text(), nullable=True))
+    op.add_column('conversations', sa.Column('summarized_message_count', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('conversations', 'summarized_message_count')
+    op.drop_column('conversations', 'summary')
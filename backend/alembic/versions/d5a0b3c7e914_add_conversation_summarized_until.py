@@ -0,0 +1,25 @@
+"""add conversation summarized_until
+
+Revision ID: d5a0b3c7e914
+Revises: c41d8e2f5a67
+Create Date: 2026-10-17 11:47:02.913376
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a0b3c7e914'
+down_revision: Union[str, None] = 'c41d8e2f5a67'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('conversations', sa.Column('summarized_until', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('conversations', 'summarized_until')
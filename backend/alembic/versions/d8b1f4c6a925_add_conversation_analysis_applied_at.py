@@ -0,0 +1,25 @@
+"""add conversation analysis_applied_at
+
+Revision ID: d8b1f4c6a925
+Revises: c2a7d5e8f316
+Create Date: 2026-10-17 19:12:37.480152
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8b1f4c6a925'
+down_revision: Union[str, None] = 'c2a7d5e8f316'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('conversations', sa.Column('analysis_applied_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('conversations', 'analysis_applied_at')
@@ -0,0 +1,42 @@
+"""add hot path indexes
+
+Revision ID: e8f1a6d2b059
+Revises: d5a0b3c7e914
+Create Date: 2026-10-17 12:20:45.671902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8f1a6d2b059'
+down_revision: Union[str, None] = 'd5a0b3c7e914'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # One task per user per day; also serves the (user_id, date) lookups.
+    # Fails if duplicate tasks already exist - resolve those first.
+    op.create_unique_constraint('uq_daily_tasks_user_date', 'daily_tasks', ['user_id', 'date'])
+    # Streak / island queries only touch completed tasks
+    op.create_index('ix_daily_tasks_user_completed_date', 'daily_tasks', ['user_id', 'date'], postgresql_where=sa.text('completed IS true'))
+    op.create_index('ix_messages_conversation_created', 'messages', ['conversation_id', 'created_at'])
+    op.create_index('ix_conversations_user_type_created', 'conversations', ['user_id', 'type', 'created_at'])
+    op.create_index('ix_conversations_user_type_active', 'conversations', ['user_id', 'type'], postgresql_where=sa.text('ended_at IS NULL'))
+    op.create_index('ix_action_logs_user_logged', 'action_logs', ['user_id', 'logged_at'])
+    op.create_index('ix_insight_applications_user_insight', 'insight_applications', ['user_id', 'insight_id'])
+    op.create_index('ix_coaching_insights_target_profile', 'coaching_insights', ['target_profile'], postgresql_using='gin', postgresql_ops={'target_profile': 'jsonb_path_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_coaching_insights_target_profile', table_name='coaching_insights')
+    op.drop_index('ix_insight_applications_user_insight', table_name='insight_applications')
+    op.drop_index('ix_action_logs_user_logged', table_name='action_logs')
+    op.drop_index('ix_conversations_user_type_active', table_name='conversations')
+    op.drop_index('ix_conversations_user_type_created', table_name='conversations')
+    op.drop_index('ix_messages_conversation_created', table_name='messages')
+    op.drop_index('ix_daily_tasks_user_completed_date', table_name='daily_tasks')
+    op.drop_constraint('uq_daily_tasks_user_date', 'daily_tasks', type_='unique')
@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.deps import get_current_db_user
 from app.core.auth import get_current_user
 from app.core.database import get_db
+from app.models.user import User
 from app.schemas.user import UserResponse
 from app.services.user_service import UserService
 
@@ -26,10 +28,7 @@ async def sync_user(
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
-    current_user: dict = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_db_user),
 ):
     """Get current user information."""
-    user_service = UserService(db)
-    user = await user_service.get_by_firebase_uid(current_user["uid"])
     return user
@@ -1,14 +1,21 @@
+import json
+from collections.abc import AsyncIterator
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.auth import get_current_user
-from app.core.database import get_db
-from app.models.conversation import ConversationType, MessageRole
+from app.api.deps import get_current_db_user, get_gemini_service, limit_caller
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, get_db
+from app.jobs.handlers import ANALYZE_CONVERSATION
+from app.models.conversation import Conversation, ConversationType, MessageRole
+from app.models.user import User
 from app.schemas.conversation import (
     ConversationCreate,
     ConversationResponse,
+    EndConversationResponse,
     MessageResponse,
     SendMessageRequest,
     SendMessageResponse,
@@ -16,62 +23,48 @@ from app.schemas.conversation import (
 from app.services import (
     ConversationService,
     GeminiService,
+    JobService,
     ProfileService,
     TaskService,
-    UserService,
 )
 
 router = APIRouter()
 
+PROMPT_PROFILE_FIELDS = (
+    "thinking_style",
+    "motivation_drivers",
+    "stress_response",
+    "behavioral_patterns",
+    "values",
+    "strengths_discovered",
+    "onboarding_completed",
+)
+
 
 @router.post("/start", response_model=ConversationResponse)
 async def start_conversation(
     data: ConversationCreate,
-    current_user: dict = Depends(get_current_user),
+    user: User = Depends(get_current_db_user),
     db: AsyncSession = Depends(get_db),
+    gemini_service: GeminiService = Depends(get_gemini_service),
 ):
     """Start a new conversation."""
-    user_service = UserService(db)
-    user = await user_service.get_by_firebase_uid(current_user["uid"])
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
     conversation_service = ConversationService(db)
-    profile_service = ProfileService(db)
-    gemini_service = GeminiService()
-
-    # Get user profile
-    profile = await profile_service.get_by_user_id(user.id)
-
-    # Create new conversation
+    profile_dict = await _get_profile_dict(user, db)
+    # Today's task for daily coaching
+    task_dict = None
+    if data.type.value != "onboarding":
+        task_dict = await _get_task_dict(user, db)
+
+    # Create new conversation; its commit also ends the reads' transaction,
+    # so no connection is held while the greeting is generated
     conv_type = ConversationType(data.type.value)
     conversation = await conversation_service.create(user.id, conv_type)
 
     # Generate initial greeting based on conversation type
-    profile_dict = {
-        "thinking_style": profile.thinking_style,
-        "motivation_drivers": profile.motivation_drivers,
-        "stress_response": profile.stress_response,
-        "behavioral_patterns": profile.behavioral_patterns,
-        "values": profile.values,
-        "strengths_discovered": profile.strengths_discovered,
-        "onboarding_completed": profile.onboarding_completed,
-    }
-
     if data.type.value == "onboarding":
         greeting = await gemini_service.generate_onboarding_response([], profile_dict)
     else:
-        # Get today's task for daily coaching
-        task_service = TaskService(db)
-        today_task = await task_service.get_today_task(user.id)
-        task_dict = None
-        if today_task:
-            task_dict = {
-                "content": today_task.content,
-                "category": today_task.category.value,
-                "completed": today_task.completed,
-            }
-
         greeting = await gemini_service.generate_daily_coach_response(
             [], profile_dict, task_dict
         )
@@ -87,50 +80,118 @@ async def start_conversation(
     return conversation
 
 
-@router.post("/message", response_model=SendMessageResponse)
-async def send_message(
-    data: SendMessageRequest,
-    current_user: dict = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
-):
-    """Send a message and get AI response."""
-    user_service = UserService(db)
-    user = await user_service.get_by_firebase_uid(current_user["uid"])
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+async def _get_profile_dict(user: User, db: AsyncSession) -> dict:
+    """The profile fields used in coaching prompts, from the profile cache."""
+    profile = await ProfileService(db).get_snapshot(user.id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return {field: profile[field] for field in PROMPT_PROFILE_FIELDS}
+
+
+async def _get_task_dict(user: User, db: AsyncSession) -> dict | None:
+    """Today's task as used in daily coaching prompts, if there is one."""
+    today_task = await TaskService(db).get_today_task(user.id)
+    if today_task is None:
+        return None
+    return {
+        "content": today_task.content,
+        "category": today_task.category.value,
+        "completed": today_task.completed,
+    }
 
+
+async def _prepare_turn(
+    data: SendMessageRequest,
+    user: User,
+    db: AsyncSession,
+) -> tuple[Conversation, list[dict], dict, dict | None]:
+    """
+    Gather everything the model needs and store the user message.
+
+    The reads come first so start_turn's commit ends the request's
+    transaction: no connection is held while the response is generated.
+    """
     conversation_service = ConversationService(db)
-    profile_service = ProfileService(db)
-    gemini_service = GeminiService()
+    profile_dict = await _get_profile_dict(user, db)
+    task_dict = None
+    if data.type.value != "onboarding":
+        task_dict = await _get_task_dict(user, db)
 
     # Get or create conversation
     if data.conversation_id:
-        conversation = await conversation_service.get_by_id(data.conversation_id)
-        if not conversation or conversation.user_id != user.id:
+        conversation = await conversation_service.get_for_user(
+            data.conversation_id, user.id
+        )
+        if not conversation:
             raise HTTPException(status_code=404, detail="Conversation not found")
     else:
         conv_type = ConversationType(data.type.value)
         conversation = await conversation_service.create(user.id, conv_type)
 
-    # Add user message
-    await conversation_service.add_message(
-        conversation.id, MessageRole.USER, data.message
-    )
+    # Add user message and read bounded history in one statement
+    history = await conversation_service.start_turn(conversation, data.message)
 
-    # Get conversation history
-    history = await conversation_service.get_conversation_history(conversation.id)
-
-    # Get user profile
-    profile = await profile_service.get_by_user_id(user.id)
-    profile_dict = {
-        "thinking_style": profile.thinking_style,
-        "motivation_drivers": profile.motivation_drivers,
-        "stress_response": profile.stress_response,
-        "behavioral_patterns": profile.behavioral_patterns,
-        "values": profile.values,
-        "strengths_discovered": profile.strengths_discovered,
-        "onboarding_completed": profile.onboarding_completed,
-    }
+    return conversation, history, profile_dict, task_dict
+
+
+async def _refresh_summary(
+    conversation_id: UUID,
+    gemini_service: GeminiService,
+) -> None:
+    """Update the rolling summary after the response has been sent."""
+    async with AsyncSessionLocal() as session:
+        try:
+            await ConversationService(session).refresh_summary(
+                conversation_id, gemini_service
+            )
+        except Exception as e:
+            print(f"Summary refresh error: {e}")
+
+
+async def _queue_analysis(conversation_id: UUID, user_id: UUID) -> None:
+    """Queue an incremental analysis once enough new messages accumulated."""
+    async with AsyncSessionLocal() as session:
+        try:
+            conversation = await session.get(Conversation, conversation_id)
+            if conversation is None:
+                return
+            count = await ConversationService(session).count_unanalyzed(conversation)
+            payload = {"conversation_id": str(conversation_id)}
+            job_service = JobService(session)
+            if count >= settings.ANALYSIS_INTERVAL_MESSAGES and not (
+                await job_service.is_queued(ANALYZE_CONVERSATION, payload)
+            ):
+                job_service.enqueue(ANALYZE_CONVERSATION, payload, user_id=user_id)
+                await session.commit()
+        except Exception as e:
+            print(f"Analysis queue error: {e}")
+
+
+def _add_background_tasks(
+    background_tasks: BackgroundTasks,
+    conversation: Conversation,
+    gemini_service: GeminiService,
+) -> None:
+    background_tasks.add_task(_refresh_summary, conversation.id, gemini_service)
+    if settings.ANALYSIS_INTERVAL_MESSAGES > 0:
+        background_tasks.add_task(
+            _queue_analysis, conversation.id, conversation.user_id
+        )
+
+
+@router.post(
+    "/message", response_model=SendMessageResponse, dependencies=[Depends(limit_caller)]
+)
+async def send_message(
+    data: SendMessageRequest,
+    background_tasks: BackgroundTasks,
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+    gemini_service: GeminiService = Depends(get_gemini_service),
+):
+    """Send a message and get AI response."""
+    conversation, history, profile_dict, task_dict = await _prepare_turn(data, user, db)
+    _add_background_tasks(background_tasks, conversation, gemini_service)
 
     # Generate AI response
     if data.type.value == "onboarding":
@@ -138,21 +199,12 @@ async def send_message(
             history, profile_dict
         )
     else:
-        task_service = TaskService(db)
-        today_task = await task_service.get_today_task(user.id)
-        task_dict = None
-        if today_task:
-            task_dict = {
-                "content": today_task.content,
-                "category": today_task.category.value,
-                "completed": today_task.completed,
-            }
-
         response_text = await gemini_service.generate_daily_coach_response(
             history, profile_dict, task_dict
         )
 
     # Add AI response
+    conversation_service = ConversationService(db)
     ai_message = await conversation_service.add_message(
         conversation.id, MessageRole.ASSISTANT, response_text
     )
@@ -168,41 +220,98 @@ async def send_message(
     )
 
 
-@router.post("/{conversation_id}/end", response_model=ConversationResponse)
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/message/stream", dependencies=[Depends(limit_caller)])
+async def stream_message(
+    data: SendMessageRequest,
+    background_tasks: BackgroundTasks,
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+    gemini_service: GeminiService = Depends(get_gemini_service),
+):
+    """
+    Send a message and stream the AI response as Server-Sent Events.
+
+    Emits `token` events with response chunks, then a single `done` event
+    carrying the persisted SendMessageResponse. The assistant message is only
+    stored once the stream completes; if the client disconnects the upstream
+    generation is closed and nothing is written.
+    """
+    conversation, history, profile_dict, task_dict = await _prepare_turn(data, user, db)
+    _add_background_tasks(background_tasks, conversation, gemini_service)
+    conversation_id = conversation.id
+
+    if data.type.value == "onboarding":
+        chunks = gemini_service.stream_onboarding_response(history, profile_dict)
+    else:
+        chunks = gemini_service.stream_daily_coach_response(
+            history, profile_dict, task_dict
+        )
+
+    async def event_stream() -> AsyncIterator[str]:
+        parts: list[str] = []
+        try:
+            async for chunk in chunks:
+                parts.append(chunk)
+                yield _sse("token", {"content": chunk})
+        except Exception as e:
+            yield _sse("error", {"detail": str(e)})
+            return
+        finally:
+            await chunks.aclose()
+
+        # The request-scoped session may already be closed once the response
+        # has started, so persist the final message with a session of our own.
+        async with AsyncSessionLocal() as session:
+            ai_message = await ConversationService(session).add_message(
+                conversation_id, MessageRole.ASSISTANT, "".join(parts)
+            )
+
+        response = SendMessageResponse(
+            conversation_id=conversation_id,
+            message=MessageResponse(
+                id=ai_message.id,
+                role=ai_message.role,
+                content=ai_message.content,
+                created_at=ai_message.created_at,
+            ),
+        )
+        yield _sse("done", response.model_dump(mode="json"))
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/{conversation_id}/end", response_model=EndConversationResponse)
 async def end_conversation(
     conversation_id: UUID,
-    current_user: dict = Depends(get_current_user),
+    user: User = Depends(get_current_db_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """End a conversation and trigger analysis."""
-    user_service = UserService(db)
-    user = await user_service.get_by_firebase_uid(current_user["uid"])
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
+    """End a conversation and queue its analysis."""
     conversation_service = ConversationService(db)
     conversation = await conversation_service.get_by_id(conversation_id)
 
     if not conversation or conversation.user_id != user.id:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
-    # Analyze conversation and update profile
-    gemini_service = GeminiService()
-    profile_service = ProfileService(db)
-
-    history = await conversation_service.get_conversation_history(conversation_id)
-    analysis = await gemini_service.analyze_conversation(history)
-
-    if analysis:
-        await profile_service.update_profile_from_analysis(user.id, analysis)
-        if "insight" in analysis:
-            await profile_service.add_conversation_insight(
-                user.id,
-                analysis["insight"],
-                f"{conversation.type.value} conversation",
-            )
-
-    # End conversation
-    conversation = await conversation_service.end_conversation(conversation_id)
+    job = None
+    if conversation.ended_at is None:
+        # Analysis of the remaining messages and profile updates run in a job
+        # worker; the job is committed together with ended_at
+        job = JobService(db).enqueue(
+            ANALYZE_CONVERSATION,
+            {"conversation_id": str(conversation.id)},
+            user_id=user.id,
+        )
+        conversation = await conversation_service.end_conversation(conversation)
 
-    return conversation
+    response = EndConversationResponse.model_validate(conversation)
+    response.analysis_job_id = job.id if job else None
+    return response
@@ -0,0 +1,53 @@
+from fastapi import Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.admission import admission_controller, retry_after
+from app.core.auth import get_current_user
+from app.core.config import settings
+from app.core.database import get_db
+from app.models.user import User
+from app.services import GeminiService
+from app.services.user_service import UserService
+
+
+async def get_current_db_user(
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> User:
+    """
+    Resolve the authenticated user once per request.
+
+    The profile is not loaded; use ProfileService.get_snapshot (cached).
+    """
+    user_service = UserService(db)
+    user = await user_service.get_by_firebase_uid(current_user["uid"])
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+
+async def limit_caller(current_user: dict = Depends(get_current_user)) -> None:
+    """
+    Take a token from the authenticated caller's admission bucket.
+
+    Runs after token verification (cached per token), so the bucket is the
+    user's however many tokens or header spellings they send.
+    """
+    if not settings.ADMISSION_ENABLED:
+        return
+    wait = await admission_controller.throttle("user:" + current_user["uid"])
+    if wait > 0:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests",
+            headers={"Retry-After": retry_after(wait)},
+        )
+
+
+def get_gemini_service(request: Request) -> GeminiService:
+    """Return the process-wide GeminiService created in the app lifespan."""
+    gemini_service = getattr(request.app.state, "gemini_service", None)
+    if gemini_service is None:
+        # App started without its lifespan (e.g. a bare ASGI mount)
+        gemini_service = request.app.state.gemini_service = GeminiService()
+    return gemini_service
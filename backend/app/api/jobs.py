@@ -0,0 +1,26 @@
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_current_db_user
+from app.core.database import get_db
+from app.models.user import User
+from app.schemas.job import JobResponse
+from app.services.job_service import JobService
+
+router = APIRouter()
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: UUID,
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Get the status of one of the user's background jobs."""
+    job = await JobService(db).get_for_user(job_id, user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return job
@@ -1,11 +1,14 @@
+from datetime import date
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.auth import get_current_user
-from app.core.database import get_db
-from app.models.task import TaskCategory
+from app.api.deps import get_current_db_user, get_gemini_service, limit_caller
+from app.core.database import AsyncSessionLocal, get_db
+from app.core.singleflight import SingleFlight
+from app.models.task import DailyTask
+from app.models.user import User
 from app.schemas.task import (
     DailyTaskResponse,
     ProgressStatsResponse,
@@ -15,71 +18,71 @@ from app.services import (
     GeminiService,
     ProfileService,
     TaskService,
-    UserService,
 )
 
 router = APIRouter()
 
+# Coalesces concurrent on-demand generations per (user_id, date)
+today_task_flights = SingleFlight()
 
-@router.get("/today", response_model=DailyTaskResponse)
+
+@router.get(
+    "/today", response_model=DailyTaskResponse, dependencies=[Depends(limit_caller)]
+)
 async def get_today_task(
-    current_user: dict = Depends(get_current_user),
+    user: User = Depends(get_current_db_user),
     db: AsyncSession = Depends(get_db),
+    gemini_service: GeminiService = Depends(get_gemini_service),
 ):
     """Get today's task. Creates one if not exists."""
-    user_service = UserService(db)
-    user = await user_service.get_by_firebase_uid(current_user["uid"])
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
     task_service = TaskService(db)
     task = await task_service.get_today_task(user.id)
 
     if not task:
-        # Generate new task
-        profile_service = ProfileService(db)
-        profile = await profile_service.get_by_user_id(user.id)
-
-        profile_dict = {
-            "thinking_style": profile.thinking_style,
-            "motivation_drivers": profile.motivation_drivers,
-            "behavioral_patterns": profile.behavioral_patterns,
-            "values": profile.values,
-        }
-
-        gemini_service = GeminiService()
-
-        # Choose category based on user preferences (simple rotation for MVP)
-        categories = [
-            TaskCategory.STUDY,
-            TaskCategory.LIFESTYLE,
-            TaskCategory.EXERCISE,
-            TaskCategory.SELF_EXPLORATION,
-        ]
-        from datetime import date
+        # Normally pre-generated by app.jobs.pregenerate_tasks; this is the
+        # on-demand fallback for a miss. Concurrent misses for the same user
+        # share one generation.
+        today = date.today()
+        profile = await ProfileService(db).get_snapshot(user.id)
+        if profile is None:
+            raise HTTPException(status_code=404, detail="Profile not found")
+        profile_dict = TaskService.task_profile_dict(profile)
+        # End the read transaction so waiters do not hold a connection for
+        # the length of the generation; the flight inserts on its own session
+        await db.commit()
+        task = await today_task_flights.do(
+            (user.id, today),
+            lambda: _generate_task(user.id, profile_dict, today, gemini_service),
+        )
 
-        category = categories[date.today().day % len(categories)]
+    return task
 
-        task_content = await gemini_service.generate_task(profile_dict, category.value)
 
-        task = await task_service.create_task(user.id, task_content, category)
+async def _generate_task(
+    user_id: UUID,
+    profile_dict: dict,
+    task_date: date,
+    gemini_service: GeminiService,
+) -> DailyTask:
+    """Generate and store a user's task; runs once per (user, date) flight."""
+    category = TaskService.choose_category(task_date)
+    task_content = await gemini_service.generate_task(profile_dict, category.value)
 
-    return task
+    # Own session: the flight may outlive the request that started it
+    async with AsyncSessionLocal() as db:
+        return await TaskService(db).create_task(
+            user_id, task_content, category, task_date
+        )
 
 
 @router.post("/{task_id}/complete", response_model=DailyTaskResponse)
 async def complete_task(
     task_id: UUID,
     data: TaskCompleteRequest,
-    current_user: dict = Depends(get_current_user),
+    user: User = Depends(get_current_db_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Mark task as completed."""
-    user_service = UserService(db)
-    user = await user_service.get_by_firebase_uid(current_user["uid"])
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
     task_service = TaskService(db)
     task = await task_service.complete_task(task_id, data.perceived_load)
 
@@ -92,15 +95,10 @@ async def complete_task(
 @router.post("/{task_id}/skip", response_model=DailyTaskResponse)
 async def skip_task(
     task_id: UUID,
-    current_user: dict = Depends(get_current_user),
+    user: User = Depends(get_current_db_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Skip today's task."""
-    user_service = UserService(db)
-    user = await user_service.get_by_firebase_uid(current_user["uid"])
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
     task_service = TaskService(db)
     task = await task_service.skip_task(task_id)
 
@@ -112,24 +110,16 @@ async def skip_task(
 
 @router.get("/progress", response_model=ProgressStatsResponse)
 async def get_progress_stats(
-    current_user: dict = Depends(get_current_user),
+    user: User = Depends(get_current_db_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Get progress statistics."""
-    user_service = UserService(db)
-    user = await user_service.get_by_firebase_uid(current_user["uid"])
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
     task_service = TaskService(db)
-
-    streak_days = await task_service.get_streak_days(user.id)
-    completion_stats = await task_service.get_completion_stats(user.id)
-    weekly_stats = await task_service.get_weekly_stats(user.id)
+    stats = await task_service.get_progress_stats(user.id)
 
     return ProgressStatsResponse(
-        streak_days=streak_days,
-        total_completed=completion_stats["total_completed"],
-        completion_rate=completion_stats["completion_rate"],
-        weekly_stats=weekly_stats,
+        streak_days=stats["streak_days"],
+        total_completed=stats["total_completed"],
+        completion_rate=stats["completion_rate"],
+        weekly_stats=stats["weekly_stats"],
     )
@@ -0,0 +1,240 @@
+"""
+Admission control for LLM-backed routes.
+
+Requests to ADMISSION_PATHS are admitted by AdmissionControlMiddleware only
+if the instance has fewer than ADMISSION_MAX_IN_FLIGHT of them running
+(otherwise 503). Routes depending on app.api.deps.limit_caller also take a
+token from the caller's bucket (otherwise 429). Both carry Retry-After, so
+bursts are shed up front instead of queueing behind the model. Buckets are
+keyed by the verified user id, after authentication: keying by the raw
+Authorization header would let a caller get a fresh bucket with every new
+token or header spelling.
+
+Buckets live in-process by default. With ADMISSION_STORE_URL set to a
+redis:// URL they are shared by all instances (refilled atomically in a Lua
+script using the server clock); "fake://" uses an in-memory FakeRedis.
+"""
+
+import json
+import math
+import time
+from collections import OrderedDict
+from typing import Protocol
+
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.cache import FakeRedis
+from app.core.config import settings
+
+# KEYS[1] = bucket, ARGV = rate (tokens/s), burst. Returns the wait in
+# seconds as a string (0 = admitted); Lua numbers would be truncated.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'at')
+local tokens = tonumber(state[1]) or burst
+local at = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(now - at, 0) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+
+def _take(
+    tokens: float,
+    at: float,
+    now: float,
+    rate: float,
+    burst: int,
+) -> tuple[float, float]:
+    """Refill since `at` and take one token: (tokens left, wait seconds)."""
+    tokens = min(burst, tokens + max(now - at, 0.0) * rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rate
+
+
+class TokenBucketStore(Protocol):
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        """Take a token from `key`'s bucket; seconds to wait if there is none."""
+        ...
+
+
+class LocalTokenBucketStore:
+    """Per-process buckets, least recently used evicted beyond max_keys."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        now = time.monotonic()
+        tokens, at = self._buckets.pop(key, (burst, now))
+        tokens, wait = _take(tokens, at, now, rate, burst)
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class RedisTokenBucketStore:
+    """Buckets shared by every instance through a Redis-compatible client."""
+
+    def __init__(self, client, prefix: str = ""):
+        self.client = client
+        self.prefix = prefix
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        wait = await self.client.eval(
+            TOKEN_BUCKET_SCRIPT, 1, self.prefix + key, rate, burst
+        )
+        return float(wait)
+
+
+async def _fake_token_bucket(client: FakeRedis, keys: list, args: list) -> str:
+    """TOKEN_BUCKET_SCRIPT for FakeRedis."""
+    rate, burst = float(args[0]), int(args[1])
+    now = time.monotonic()
+    state = await client.get(keys[0])
+    tokens, at = json.loads(state) if state else (burst, now)
+    tokens, wait = _take(tokens, at, now, rate, burst)
+    await client.set(keys[0], json.dumps([tokens, now]), ex=burst / rate + 1)
+    return str(wait)
+
+
+def create_bucket_store(url: str, prefix: str = "") -> TokenBucketStore:
+    """ "" for in-process, "fake://" for FakeRedis, or a redis:// URL."""
+    if not url:
+        return LocalTokenBucketStore()
+    if url.startswith("fake://"):
+        client = FakeRedis()
+        client.scripts[TOKEN_BUCKET_SCRIPT] = _fake_token_bucket
+        return RedisTokenBucketStore(client, prefix)
+
+    from redis import asyncio as redis
+
+    return RedisTokenBucketStore(redis.from_url(url), prefix)
+
+
+class AdmissionController:
+    """Instance-wide in-flight cap plus per-caller token buckets."""
+
+    def __init__(
+        self,
+        store: TokenBucketStore,
+        rate_per_minute: float,
+        burst: int,
+        max_in_flight: int,
+    ):
+        self.store = store
+        self.rate = rate_per_minute / 60
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.admitted = 0
+        self.rate_limited = 0
+        self.overloaded = 0
+        self.store_errors = 0
+
+    def admit(self) -> JSONResponse | None:
+        """None if admitted (call release() when done), else the rejection."""
+        if self.in_flight >= self.max_in_flight:
+            self.overloaded += 1
+            return _rejection(503, "Server is busy, please retry shortly", 1.0)
+        self.in_flight += 1
+        self.admitted += 1
+        return None
+
+    async def throttle(self, key: str) -> float:
+        """Take a token from `key`'s bucket; seconds to wait if there is none."""
+        try:
+            wait = await self.store.take(key, self.rate, self.burst)
+        except Exception as e:
+            # Fail open: the in-flight cap still protects the instance
+            print(f"Admission store error: {e}")
+            self.store_errors += 1
+            return 0.0
+        if wait > 0:
+            self.rate_limited += 1
+        return wait
+
+    def release(self) -> None:
+        self.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "admitted": self.admitted,
+            "rate_limited": self.rate_limited,
+            "overloaded": self.overloaded,
+            "store_errors": self.store_errors,
+        }
+
+
+def retry_after(seconds: float) -> str:
+    """Retry-After header value: whole seconds, at least 1."""
+    return str(max(math.ceil(seconds), 1))
+
+
+def _rejection(status_code: int, detail: str, wait: float) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content={"detail": detail},
+        headers={"Retry-After": retry_after(wait)},
+    )
+
+
+class AdmissionControlMiddleware:
+    """
+    ASGI middleware applying an AdmissionController's in-flight cap to
+    requests whose path starts with one of `paths`. The in-flight slot is
+    held until the app returns, i.e. until a streamed response has been
+    fully sent.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        controller: AdmissionController,
+        paths: list[str],
+    ):
+        self.app = app
+        self.controller = controller
+        self.paths = tuple(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] == "OPTIONS"
+            or not scope["path"].startswith(self.paths)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        rejection = self.controller.admit()
+        if rejection is not None:
+            await rejection(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
+
+
+admission_controller = AdmissionController(
+    create_bucket_store(settings.ADMISSION_STORE_URL, prefix="admission:"),
+    rate_per_minute=settings.ADMISSION_RATE_PER_MINUTE,
+    burst=settings.ADMISSION_BURST,
+    max_in_flight=settings.ADMISSION_MAX_IN_FLIGHT,
+)
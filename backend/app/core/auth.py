@@ -1,7 +1,14 @@
+import asyncio
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
 from app.core.config import settings
+from app.core.token_verifier import (
+    FirebaseTokenVerifier,
+    GoogleKeySource,
+    PublicKeyStore,
+)
 
 security = HTTPBearer(auto_error=not settings.MOCK_MODE)
 
@@ -18,6 +25,16 @@ if not settings.MOCK_MODE:
         else:
             firebase_admin.initialize_app()
 
+# Verify ID tokens locally when the project is known; otherwise fall back to
+# firebase_admin, run in a worker thread.
+token_verifier: FirebaseTokenVerifier | None = None
+if not settings.MOCK_MODE and settings.FIREBASE_PROJECT_ID:
+    token_verifier = FirebaseTokenVerifier(
+        project_id=settings.FIREBASE_PROJECT_ID,
+        key_store=PublicKeyStore(GoogleKeySource(settings.FIREBASE_CERTS_URL)),
+        cache_size=settings.AUTH_TOKEN_CACHE_SIZE,
+    )
+
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials | None = Depends(security),
@@ -51,7 +68,10 @@ async def get_current_user(
 
     try:
         token = credentials.credentials
-        decoded_token = auth.verify_id_token(token)
+        if token_verifier is not None:
+            decoded_token = await token_verifier.verify(token)
+        else:
+            decoded_token = await asyncio.to_thread(auth.verify_id_token, token)
         return {
             "uid": decoded_token["uid"],
             "email": decoded_token.get("email"),
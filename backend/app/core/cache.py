@@ -0,0 +1,204 @@
+import random
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, Protocol
+
+
+class TTLCache:
+    """Small in-process LRU cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class VariantCache:
+    """
+    LRU cache keeping up to `variants` values per key, each for `ttl` seconds.
+
+    `get` only answers once a key's pool is full, so the first `variants`
+    lookups still produce (and `add`) fresh values; after that a random one
+    is returned, which keeps some diversity among cached responses.
+    """
+
+    def __init__(self, max_size: int, ttl: float, variants: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.variants = variants
+        self._entries: OrderedDict[Hashable, list[tuple[float, Any]]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        now = time.monotonic()
+        pool = [entry for entry in self._entries.get(key, []) if entry[0] > now]
+        if pool:
+            self._entries[key] = pool
+            self._entries.move_to_end(key)
+        else:
+            self._entries.pop(key, None)
+
+        if len(pool) < self.variants:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return random.choice(pool)[1]
+
+    def add(self, key: Hashable, value: Any) -> None:
+        pool = self._entries.setdefault(key, [])
+        if len(pool) < self.variants:
+            pool.append((time.monotonic() + self.ttl, value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "keys": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class CacheBackend(Protocol):
+    """Async string cache used for shared snapshots (e.g. profiles)."""
+
+    async def get(self, key: str) -> str | None: ...
+
+    async def set(self, key: str, value: str) -> None: ...
+
+    async def delete(self, key: str) -> None: ...
+
+    def stats(self) -> dict: ...
+
+
+class LocalCacheBackend:
+    """In-process LRU + TTL backend; invalidations are not shared."""
+
+    def __init__(self, max_size: int, ttl: float):
+        self._cache = TTLCache(max_size, ttl)
+
+    async def get(self, key: str) -> str | None:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: str) -> None:
+        self._cache.set(key, value)
+
+    async def delete(self, key: str) -> None:
+        self._cache.delete(key)
+
+    def stats(self) -> dict:
+        return {"backend": "local", **self._cache.stats()}
+
+
+class RedisCacheBackend:
+    """Backend for any client with the redis.asyncio get/set/delete API."""
+
+    def __init__(self, client, ttl: float, prefix: str = ""):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> str | None:
+        value = await self.client.get(self.prefix + key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value.decode() if isinstance(value, bytes) else value
+
+    async def set(self, key: str, value: str) -> None:
+        await self.client.set(self.prefix + key, value, ex=max(int(self.ttl), 1))
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(self.prefix + key)
+
+    def stats(self) -> dict:
+        return {"backend": "redis", "hits": self.hits, "misses": self.misses}
+
+
+class FakeRedis:
+    """
+    In-memory stand-in for a redis.asyncio client (get/set/delete, and eval
+    of scripts given a Python equivalent in `scripts`; Lua is not run).
+    """
+
+    def __init__(self):
+        self._data: dict[str, tuple[float | None, str]] = {}
+        # script source -> async fn(client, keys, args)
+        self.scripts: dict[str, Callable[..., Awaitable[Any]]] = {}
+
+    async def get(self, key: str) -> str | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: str, ex: float | None = None) -> None:
+        expires_at = time.monotonic() + ex if ex is not None else None
+        self._data[key] = (expires_at, value)
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self._data.pop(key, None) is not None for key in keys)
+
+    async def eval(self, script: str, numkeys: int, *keys_and_args) -> Any:
+        return await self.scripts[script](
+            self, list(keys_and_args[:numkeys]), list(keys_and_args[numkeys:])
+        )
+
+
+def create_cache_backend(
+    url: str,
+    max_size: int,
+    ttl: float,
+    prefix: str = "",
+) -> CacheBackend:
+    """
+    Build a backend from a URL: "" for in-process, "fake://" for FakeRedis,
+    or a redis:// URL (requires the optional `redis` package).
+    """
+    if not url:
+        return LocalCacheBackend(max_size, ttl)
+    if url.startswith("fake://"):
+        return RedisCacheBackend(FakeRedis(), ttl, prefix)
+
+    from redis import asyncio as redis
+
+    return RedisCacheBackend(redis.from_url(url), ttl, prefix)
@@ -1,12 +1,80 @@
+import asyncio
+import time
+from contextlib import AsyncExitStack
+
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
 
 from app.core.config import settings
 
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=settings.ENVIRONMENT == "development",
-)
+
+class PoolMetrics:
+    """Connection checkout wait times, recorded by TimedQueuePool."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float) -> None:
+        self.checkouts += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    def stats(self) -> dict:
+        pool = engine.pool
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "checkouts": self.checkouts,
+            "avg_wait_seconds": (
+                self.total_wait / self.checkouts if self.checkouts else 0.0
+            ),
+            "max_wait_seconds": self.max_wait,
+        }
+
+
+pool_metrics = PoolMetrics()
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Records how long each checkout waited for a connection.
+
+    Sessions connect lazily, on their first query, so the wait is measured
+    where it happens instead of forcing a checkout up front.
+    """
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        started = time.monotonic()
+        try:
+            return super()._do_get()
+        finally:
+            pool_metrics.record(time.monotonic() - started)
+
+
+engine_options = {
+    "poolclass": TimedQueuePool,
+    "echo": (
+        settings.DB_ECHO
+        if settings.DB_ECHO is not None
+        else settings.ENVIRONMENT == "development"
+    ),
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+}
+if settings.DATABASE_URL.startswith("postgresql+asyncpg"):
+    engine_options["connect_args"] = {
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+    }
+
+engine = create_async_engine(settings.DATABASE_URL, **engine_options)
 
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -17,6 +85,16 @@ AsyncSessionLocal = async_sessionmaker(
 Base = declarative_base()
 
 
+async def warm_up_pool(connections: int) -> None:
+    """Open `connections` pooled connections so early requests skip setup."""
+    async with AsyncExitStack() as stack:
+        # Hold them all at once so the pool really grows to `connections`
+        conns = await asyncio.gather(
+            *(stack.enter_async_context(engine.connect()) for _ in range(connections))
+        )
+        await asyncio.gather(*(conn.exec_driver_sql("SELECT 1") for conn in conns))
+
+
 async def get_db():
     async with AsyncSessionLocal() as session:
         try:
@@ -0,0 +1,105 @@
+import asyncio
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from typing import TypeVar
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+
+class LLMTimeoutError(Exception):
+    """Raised when a model call does not finish within its deadline."""
+
+
+class LLMExecutor:
+    """
+    Process-wide execution layer for LLM calls.
+
+    All model calls go through `run`, which bounds the number of in-flight
+    requests with a semaphore, applies a per-call timeout and keeps simple
+    counters so queue depth can be observed from /metrics.
+    """
+
+    def __init__(self, max_concurrency: int, timeout: float):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._waiting = 0
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one of the concurrency slots, e.g. for the life of a stream."""
+        queued_at = time.monotonic()
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+
+        self._total_wait += time.monotonic() - queued_at
+        self._in_flight += 1
+        try:
+            yield
+        except LLMTimeoutError:
+            self._timeouts += 1
+            raise
+        except Exception:
+            self._failed += 1
+            raise
+        else:
+            self._completed += 1
+        finally:
+            self._in_flight -= 1
+            self._semaphore.release()
+
+    async def run(
+        self,
+        call: Callable[[], Awaitable[T]],
+        timeout: float | None = None,
+    ) -> T:
+        """Run an async model call under the concurrency limit."""
+        async with self.slot():
+            return await self.with_timeout(call(), timeout)
+
+    async def with_timeout(
+        self,
+        awaitable: Awaitable[T],
+        timeout: float | None = None,
+    ) -> T:
+        """Await `awaitable`, raising LLMTimeoutError past the deadline."""
+        timeout = timeout or self.timeout
+        try:
+            return await asyncio.wait_for(awaitable, timeout)
+        except TimeoutError as e:
+            raise LLMTimeoutError(f"LLM call exceeded {timeout:.1f}s") from e
+
+    async def drain(self, timeout: float | None = None) -> None:
+        """Wait (up to `timeout`) until no calls are in flight."""
+        deadline = time.monotonic() + (timeout or self.timeout)
+        while self._in_flight and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+
+    def stats(self) -> dict:
+        started = self._completed + self._failed + self._timeouts
+        return {
+            "max_concurrency": self.max_concurrency,
+            "waiting": self._waiting,
+            "in_flight": self._in_flight,
+            "completed": self._completed,
+            "failed": self._failed,
+            "timeouts": self._timeouts,
+            "avg_wait_seconds": self._total_wait / started if started else 0.0,
+        }
+
+
+llm_executor = LLMExecutor(
+    max_concurrency=settings.GEMINI_MAX_CONCURRENCY,
+    timeout=settings.GEMINI_TIMEOUT_SECONDS,
+)
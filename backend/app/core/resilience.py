@@ -0,0 +1,306 @@
+"""
+Resilience policy for upstream model calls.
+
+`ResilientCaller.call` runs one operation under a deadline that covers all of
+its attempts (including waiting for a concurrency slot), retries failures
+with full-jitter exponential backoff, and can hedge: when an attempt outlives
+the operation's recent p95 latency, a second one is started and the first
+success wins. A CircuitBreaker over the recent attempts fails fast with
+CircuitOpenError while the upstream is erroring or slow, so callers can serve
+a degraded response instead of queueing behind it.
+
+Errors that `is_failure` rejects (e.g. a blocked response or a malformed
+request) say nothing about the upstream's health: they are raised at once,
+without retrying, and do not count towards the breaker.
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+from app.core.llm import LLMTimeoutError
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling upstream while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Trips when at least `failure_rate` of the last `window` attempts failed or
+    took `slow_call_seconds` or more. After `open_seconds` one probe attempt
+    is let through (half-open): success closes the breaker, failure re-opens.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        window: int,
+        min_calls: int,
+        failure_rate: float,
+        slow_call_seconds: float,
+        open_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.clock = clock
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.state = self.CLOSED
+        self._outcomes: deque[bool] = deque(maxlen=window)  # True = failed/slow
+        self._opened_at = 0.0
+        self._probing = False
+        self.trips = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN:
+            if self.clock() - self._opened_at < self.open_seconds:
+                self.rejected += 1
+                return False
+            self.state = self.HALF_OPEN
+            self._probing = False
+        if self.state == self.HALF_OPEN:
+            if self._probing:
+                self.rejected += 1
+                return False
+            self._probing = True
+        return True
+
+    def record(self, ok: bool, latency: float) -> None:
+        bad = not ok or latency >= self.slow_call_seconds
+        if self.state == self.HALF_OPEN:
+            self._probing = False
+            if bad:
+                self._trip()
+            else:
+                self.state = self.CLOSED
+            return
+
+        self._outcomes.append(bad)
+        if (
+            len(self._outcomes) >= self.min_calls
+            and sum(self._outcomes) / len(self._outcomes) >= self.failure_rate
+        ):
+            self._trip()
+
+    def release(self) -> None:
+        """An allowed attempt ended without an outcome: cancelled, or with an
+        error that says nothing about the upstream's health."""
+        if self.state == self.HALF_OPEN:
+            self._probing = False
+
+    def _trip(self) -> None:
+        self.state = self.OPEN
+        self._opened_at = self.clock()
+        self._outcomes.clear()
+        self.trips += 1
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "recent_failure_rate": (
+                sum(self._outcomes) / len(self._outcomes) if self._outcomes else 0.0
+            ),
+            "trips": self.trips,
+            "rejected": self.rejected,
+        }
+
+
+class LatencyTracker:
+    """Latencies of the most recent successful attempts."""
+
+    def __init__(self, size: int = 200):
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def add(self, latency: float) -> None:
+        self._samples.append(latency)
+
+    def percentile(self, q: float, min_samples: int = 1) -> float | None:
+        if len(self._samples) < max(min_samples, 1):
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class ResilientCaller:
+    """Deadlines, jittered retries, hedging and a shared circuit breaker."""
+
+    def __init__(
+        self,
+        breaker: CircuitBreaker,
+        retries: int,
+        retry_base: float,
+        hedge: bool = False,
+        hedge_min_samples: int = 20,
+        is_failure: Callable[[Exception], bool] = lambda error: True,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.breaker = breaker
+        self.retries = retries
+        self.retry_base = retry_base
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+        self.is_failure = is_failure
+        self.clock = clock
+        self._latency: dict[str, LatencyTracker] = {}
+        self._counters: dict[str, dict[str, int]] = {}
+
+    async def call(
+        self,
+        operation: str,
+        attempt: Callable[[], Awaitable[T]],
+        deadline: float,
+        hedge: bool = True,
+    ) -> T:
+        """
+        Run `attempt` until it succeeds or `deadline` seconds have passed.
+
+        Raises CircuitOpenError when the breaker rejects an attempt, an error
+        `is_failure` rejects as soon as it occurs, the last attempt's error
+        when retries are exhausted, or LLMTimeoutError when the deadline
+        leaves no room for another attempt.
+        """
+        counters = self._counters_for(operation)
+        counters["calls"] += 1
+        end = self.clock() + deadline
+        error: Exception | None = None
+
+        for number in range(self.retries + 1):
+            if number:
+                # Full jitter: spreads retries of concurrent callers apart
+                delay = random.uniform(0, self.retry_base * 2 ** (number - 1))
+                if self.clock() + delay >= end:
+                    break
+                await asyncio.sleep(delay)
+                counters["retries"] += 1
+            try:
+                if hedge and self.hedge:
+                    return await self._hedged(operation, attempt, end)
+                return await self._attempt(operation, attempt, end)
+            except CircuitOpenError:
+                counters["rejected"] += 1
+                raise
+            except Exception as e:
+                if not self.is_failure(e):
+                    counters["not_retried"] += 1
+                    raise
+                error = e
+            if self.clock() >= end:
+                break
+
+        counters["failures"] += 1
+        if error is None or isinstance(error, LLMTimeoutError):
+            counters["deadline_exceeded"] += 1
+            raise LLMTimeoutError(
+                f"{operation} call exceeded its {deadline:.1f}s deadline"
+            ) from error
+        raise error
+
+    async def _attempt(
+        self,
+        operation: str,
+        attempt: Callable[[], Awaitable[T]],
+        end: float,
+    ) -> T:
+        if not self.breaker.allow():
+            raise CircuitOpenError("Gemini circuit breaker is open")
+
+        started = self.clock()
+        try:
+            result = await asyncio.wait_for(attempt(), max(end - started, 0.0))
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        except TimeoutError as e:
+            self.breaker.record(False, self.clock() - started)
+            raise LLMTimeoutError(f"{operation} attempt exceeded its deadline") from e
+        except Exception as e:
+            if self.is_failure(e):
+                self.breaker.record(False, self.clock() - started)
+            else:
+                self.breaker.release()
+            raise
+
+        latency = self.clock() - started
+        self.breaker.record(True, latency)
+        self._latency_for(operation).add(latency)
+        return result
+
+    async def _hedged(
+        self,
+        operation: str,
+        attempt: Callable[[], Awaitable[T]],
+        end: float,
+    ) -> T:
+        """Start a second attempt if the first outlives the recent p95."""
+        delay = self._latency_for(operation).percentile(0.95, self.hedge_min_samples)
+        if delay is None or self.clock() + delay >= end:
+            return await self._attempt(operation, attempt, end)
+
+        pending = {asyncio.ensure_future(self._attempt(operation, attempt, end))}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if not done:
+                self._counters[operation]["hedges"] += 1
+                pending.add(
+                    asyncio.ensure_future(self._attempt(operation, attempt, end))
+                )
+            error: BaseException | None = None
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    # Keep the first attempt's error over a rejected hedge
+                    if error is None or isinstance(error, CircuitOpenError):
+                        error = task.exception()
+                if not pending:
+                    raise error
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _latency_for(self, operation: str) -> LatencyTracker:
+        if operation not in self._latency:
+            self._latency[operation] = LatencyTracker()
+        return self._latency[operation]
+
+    def _counters_for(self, operation: str) -> dict[str, int]:
+        if operation not in self._counters:
+            self._counters[operation] = dict.fromkeys(
+                (
+                    "calls",
+                    "retries",
+                    "hedges",
+                    "rejected",
+                    "not_retried",
+                    "failures",
+                    "deadline_exceeded",
+                ),
+                0,
+            )
+        return self._counters[operation]
+
+    def stats(self) -> dict:
+        return {
+            "breaker": self.breaker.stats(),
+            "operations": {
+                operation: {
+                    **counters,
+                    "p95_seconds": self._latency_for(operation).percentile(0.95),
+                }
+                for operation, counters in self._counters.items()
+            },
+        }
@@ -0,0 +1,210 @@
+"""
+Local verification of Firebase ID tokens.
+
+Firebase ID tokens are RS256 JWTs signed with Google's rotating securetoken
+keys. Instead of calling firebase_admin on every request, the public
+certificates are cached (and refreshed in the background before they
+expire), signatures are checked in a worker thread, and verified claims are
+cached by token hash until the token's own `exp`.
+"""
+
+import asyncio
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from typing import Protocol
+
+import httpx
+from jose import jwt
+
+# Refresh keys this many seconds before the advertised expiry
+KEY_REFRESH_MARGIN = 300
+DEFAULT_KEY_TTL = 3600
+# Minimum gap between forced refetches triggered by an unknown `kid`
+MIN_FORCED_REFRESH_INTERVAL = 60
+
+
+class TokenVerificationError(Exception):
+    """Raised when an ID token is malformed, expired or badly signed."""
+
+
+class KeySource(Protocol):
+    async def fetch(self) -> tuple[dict[str, str], float]:
+        """Return ({kid: PEM certificate}, ttl in seconds)."""
+        ...
+
+
+class GoogleKeySource:
+    """Fetches Google's x509 securetoken certificates."""
+
+    def __init__(self, url: str):
+        self.url = url
+
+    async def fetch(self) -> tuple[dict[str, str], float]:
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            response = await client.get(self.url)
+            response.raise_for_status()
+
+        ttl = DEFAULT_KEY_TTL
+        match = re.search(r"max-age=(\d+)", response.headers.get("cache-control", ""))
+        if match:
+            ttl = int(match.group(1))
+        return response.json(), ttl
+
+
+class LocalKeySource:
+    """Static key set, e.g. a locally generated key pair for tests."""
+
+    def __init__(self, keys: dict[str, str], ttl: float = DEFAULT_KEY_TTL):
+        self.keys = keys
+        self.ttl = ttl
+
+    async def fetch(self) -> tuple[dict[str, str], float]:
+        return dict(self.keys), self.ttl
+
+
+class PublicKeyStore:
+    """Caches signing keys and refreshes them before they expire."""
+
+    def __init__(self, source: KeySource):
+        self.source = source
+        self._keys: dict[str, str] = {}
+        self._expires_at = 0.0
+        self._fetched_at = float("-inf")
+        self._lock = asyncio.Lock()
+        self._refresh_task: asyncio.Task | None = None
+
+    async def get(self, kid: str) -> str:
+        now = time.monotonic()
+        unknown = (
+            kid not in self._keys
+            and now - self._fetched_at >= MIN_FORCED_REFRESH_INTERVAL
+        )
+        if now >= self._expires_at or unknown:
+            await self.refresh(force=unknown)
+        try:
+            return self._keys[kid]
+        except KeyError:
+            raise TokenVerificationError(f"Unknown signing key: {kid}") from None
+
+    async def refresh(self, force: bool = False) -> None:
+        async with self._lock:
+            # Another coroutine may have refreshed while we waited
+            if not force and time.monotonic() < self._expires_at:
+                return
+            keys, ttl = await self.source.fetch()
+            self._keys = keys
+            self._fetched_at = time.monotonic()
+            self._expires_at = self._fetched_at + ttl
+            self._schedule_refresh(ttl)
+
+    def _schedule_refresh(self, ttl: float) -> None:
+        # When called from the refresh task itself it is about to finish
+        if (
+            self._refresh_task is not None
+            and not self._refresh_task.done()
+            and self._refresh_task is not asyncio.current_task()
+        ):
+            self._refresh_task.cancel()
+        delay = max(ttl - KEY_REFRESH_MARGIN, ttl / 2)
+        self._refresh_task = asyncio.get_running_loop().create_task(
+            self._refresh_later(delay)
+        )
+
+    async def _refresh_later(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        try:
+            await self.refresh(force=True)
+        except Exception as e:
+            # Keep serving the current keys; the next miss retries the fetch
+            print(f"Public key refresh error: {e}")
+
+    async def close(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+
+
+class TokenCache:
+    """LRU cache of verified claims keyed by token hash, bounded by `exp`."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> dict | None:
+        key = self._key(token)
+        claims = self._entries.get(key)
+        if claims is None or claims["exp"] <= time.time():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return claims
+
+    def set(self, token: str, claims: dict) -> None:
+        key = self._key(token)
+        self._entries[key] = claims
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class FirebaseTokenVerifier:
+    """Verifies Firebase ID tokens locally with caching."""
+
+    def __init__(
+        self,
+        project_id: str,
+        key_store: PublicKeyStore,
+        cache_size: int = 10000,
+    ):
+        self.project_id = project_id
+        self.key_store = key_store
+        self.cache = TokenCache(cache_size)
+
+    async def verify(self, token: str) -> dict:
+        claims = self.cache.get(token)
+        if claims is not None:
+            return claims
+
+        try:
+            header = jwt.get_unverified_header(token)
+        except Exception as e:
+            raise TokenVerificationError(str(e)) from e
+        if header.get("alg") != "RS256":
+            raise TokenVerificationError("ID token must be signed with RS256")
+
+        key = await self.key_store.get(header.get("kid", ""))
+        # RSA verification is CPU-bound; keep it off the event loop
+        claims = await asyncio.to_thread(self._decode, token, key)
+        self.cache.set(token, claims)
+        return claims
+
+    def _decode(self, token: str, key: str) -> dict:
+        try:
+            claims = jwt.decode(
+                token,
+                key,
+                algorithms=["RS256"],
+                audience=self.project_id,
+                issuer=f"https://securetoken.google.com/{self.project_id}",
+                options={"verify_at_hash": False},
+            )
+        except Exception as e:
+            raise TokenVerificationError(str(e)) from e
+
+        if not claims.get("sub"):
+            raise TokenVerificationError("ID token has no subject")
+        claims["uid"] = claims["sub"]
+        return claims
@@ -0,0 +1,65 @@
+"""Background job handlers, keyed by Job.kind."""
+
+from collections.abc import Awaitable, Callable
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.conversation import Conversation
+from app.services import ConversationService, GeminiService, ProfileService
+
+ANALYZE_CONVERSATION = "analyze_conversation"
+
+Handler = Callable[[AsyncSession, dict, GeminiService], Awaitable[None]]
+
+
+async def analyze_conversation(
+    db: AsyncSession,
+    payload: dict,
+    gemini_service: GeminiService,
+) -> None:
+    """
+    Bring a conversation's analysis up to date with its new messages, and
+    once it has ended, merge the final estimate into the profile.
+
+    Interim passes only move the checkpoint, so each conversation counts
+    once in the profile's weighted averages however many passes it takes.
+    """
+    conversation = await db.get(Conversation, UUID(payload["conversation_id"]))
+    if conversation is None or conversation.analysis_applied_at is not None:
+        return
+
+    conversation_service = ConversationService(db)
+    # Only messages since the conversation's last analysis are sent
+    analysis = await conversation_service.analyze_new_messages(
+        conversation, gemini_service
+    )
+    if analysis is None:
+        return
+    if not analysis:
+        # Model/parse error or a concurrent pass; retry the job
+        raise RuntimeError("Conversation analysis returned no result")
+    if conversation.ended_at is None:
+        await db.commit()
+        return
+
+    # When interim passes already covered every message this is the stored
+    # estimate, so the depth score is still recorded
+    if not await conversation_service.mark_analysis_applied(conversation):
+        # A duplicate job merged it meanwhile; keep only the checkpoint
+        await db.commit()
+        return
+    # The marker, profile merge and depth score commit together
+    profile_service = ProfileService(db)
+    await profile_service.apply_conversation_analysis(
+        conversation.user_id, analysis, f"{conversation.type.value} conversation"
+    )
+    if analysis.get("depth"):
+        await conversation_service.record_depth_score(conversation, analysis["depth"])
+    await db.commit()
+    await profile_service.invalidate(conversation.user_id)
+
+
+HANDLERS: dict[str, Handler] = {
+    ANALYZE_CONVERSATION: analyze_conversation,
+}
@@ -0,0 +1,156 @@
+"""
+Pre-generate daily tasks so /api/tasks/today is a plain read.
+
+Usage:
+    python -m app.jobs.pregenerate_tasks                    # tomorrow
+    python -m app.jobs.pregenerate_tasks --date 2025-01-15
+
+Set TASK_PREGEN_ENABLED=true to run it in-process every day at
+TASK_PREGEN_HOUR instead; a Postgres advisory lock keeps multiple instances
+from doing the same work.
+"""
+
+import argparse
+import asyncio
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import and_, select, text
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, engine
+from app.models.task import DailyTask
+from app.models.user import User
+from app.models.user_profile import UserProfile
+from app.services import GeminiService
+from app.services.task_service import TASK_PROFILE_FIELDS, TaskService
+
+# Arbitrary key for pg_try_advisory_lock, shared by all instances
+ADVISORY_LOCK_KEY = 7_241_001
+
+
+async def pregenerate_tasks(
+    task_date: date,
+    gemini_service: GeminiService,
+    page_size: int | None = None,
+) -> int:
+    """Generate and bulk-insert tasks for every active user lacking one."""
+    page_size = page_size or settings.TASK_PREGEN_PAGE_SIZE
+    category = TaskService.choose_category(task_date)
+    created = 0
+    last_id = None
+
+    while True:
+        async with AsyncSessionLocal() as session:
+            query = (
+                select(
+                    User.id,
+                    *(getattr(UserProfile, field) for field in TASK_PROFILE_FIELDS),
+                )
+                .join(UserProfile, UserProfile.user_id == User.id)
+                .outerjoin(
+                    DailyTask,
+                    and_(DailyTask.user_id == User.id, DailyTask.date == task_date),
+                )
+                .where(User.is_active.is_(True), DailyTask.id.is_(None))
+                .order_by(User.id)
+                .limit(page_size)
+            )
+            if last_id is not None:
+                query = query.where(User.id > last_id)
+            rows = (await session.execute(query)).all()
+        if not rows:
+            return created
+
+        # Batched: one model call per TASK_BATCH_SIZE users (cache misses).
+        # No session is held meanwhile, so the page's connection goes back to
+        # the pool for the length of the model calls.
+        contents = await gemini_service.generate_tasks(
+            [
+                (TaskService.task_profile_dict(row._mapping), category.value)
+                for row in rows
+            ]
+        )
+        # Users whose generation failed are left to the on-demand fallback
+        tasks = [
+            {
+                "user_id": row.id,
+                "content": content,
+                "category": category,
+                "date": task_date,
+            }
+            for row, content in zip(rows, contents, strict=True)
+            if content is not None
+        ]
+        async with AsyncSessionLocal() as session:
+            created += await TaskService(session).bulk_create_tasks(tasks)
+        last_id = rows[-1][0]
+
+
+async def run_locked(task_date: date, gemini_service: GeminiService) -> int | None:
+    """
+    Run the job unless another instance holds the advisory lock.
+
+    The lock is session-level, so it outlives the transaction that took it;
+    that transaction is committed at once so the lock's connection does not
+    sit idle in a transaction for the whole run.
+    """
+    async with engine.connect() as conn:
+        locked = (
+            await conn.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": ADVISORY_LOCK_KEY}
+            )
+        ).scalar()
+        await conn.commit()
+        if not locked:
+            return None
+        try:
+            return await pregenerate_tasks(task_date, gemini_service)
+        finally:
+            await conn.execute(
+                text("SELECT pg_advisory_unlock(:key)"), {"key": ADVISORY_LOCK_KEY}
+            )
+            await conn.commit()
+
+
+async def run_scheduler(gemini_service: GeminiService) -> None:
+    """Run the job for the next day, every day at TASK_PREGEN_HOUR (local)."""
+    while True:
+        now = datetime.now()
+        next_run = now.replace(
+            hour=settings.TASK_PREGEN_HOUR, minute=0, second=0, microsecond=0
+        )
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        await asyncio.sleep((next_run - now).total_seconds())
+
+        try:
+            created = await run_locked(date.today() + timedelta(days=1), gemini_service)
+            if created is not None:
+                print(f"Pre-generated {created} task(s)")
+        except Exception as e:
+            print(f"Task pre-generation error: {e}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--date",
+        type=date.fromisoformat,
+        default=date.today() + timedelta(days=1),
+    )
+    args = parser.parse_args()
+
+    gemini_service = GeminiService()
+    try:
+        created = await run_locked(args.date, gemini_service)
+        if created is None:
+            print("Another pre-generation run holds the lock; skipping")
+        else:
+            print(f"Pre-generated {created} task(s) for {args.date.isoformat()}")
+    finally:
+        await gemini_service.close()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,58 @@
+"""
+Rebuild user_progress counters from daily_tasks.
+
+Usage:
+    python -m app.jobs.rebuild_progress                # all users
+    python -m app.jobs.rebuild_progress --user-id UUID # a single user
+"""
+
+import argparse
+import asyncio
+from uuid import UUID
+
+from sqlalchemy import select
+
+from app.core.database import AsyncSessionLocal, engine
+from app.models.user import User
+from app.services.task_service import TaskService
+
+PAGE_SIZE = 500
+
+
+async def rebuild(user_id: UUID | None = None) -> int:
+    """Rebuild progress for one user or every user. Returns users processed."""
+    async with AsyncSessionLocal() as session:
+        if user_id is not None:
+            await TaskService(session).rebuild_progress(user_id)
+            return 1
+
+        processed = 0
+        last_id = None
+        while True:
+            query = select(User.id).order_by(User.id).limit(PAGE_SIZE)
+            if last_id is not None:
+                query = query.where(User.id > last_id)
+            user_ids = (await session.execute(query)).scalars().all()
+            if not user_ids:
+                return processed
+
+            for uid in user_ids:
+                await TaskService(session).rebuild_progress(uid)
+            processed += len(user_ids)
+            last_id = user_ids[-1]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--user-id", type=UUID, default=None)
+    args = parser.parse_args()
+
+    try:
+        processed = await rebuild(args.user_id)
+        print(f"Rebuilt progress for {processed} user(s)")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
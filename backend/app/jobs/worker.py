@@ -0,0 +1,86 @@
+"""
+Run background job workers.
+
+Usage:
+    python -m app.jobs.worker
+    python -m app.jobs.worker --concurrency 4
+
+Jobs are claimed with FOR UPDATE SKIP LOCKED, so any number of worker
+processes can share the queue. The API also runs JOB_WORKERS loops
+in-process; set it to 0 when running dedicated workers instead.
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, engine
+from app.jobs.handlers import HANDLERS
+from app.models.job import Job
+from app.services import GeminiService
+from app.services.job_service import JobService
+
+# Seconds between sweeps for jobs left RUNNING by a dead worker
+STALE_SWEEP_INTERVAL = 60
+
+
+async def run_job(job: Job, gemini_service: GeminiService) -> None:
+    """Run one claimed job and record its outcome."""
+    try:
+        handler = HANDLERS.get(job.kind)
+        if handler is None:
+            raise ValueError(f"Unknown job kind: {job.kind}")
+        async with AsyncSessionLocal() as db:
+            await handler(db, job.payload, gemini_service)
+    except Exception as e:
+        print(f"Job {job.kind} {job.id} error (attempt {job.attempts}): {e}")
+        async with AsyncSessionLocal() as db:
+            await JobService(db).mark_failed(job, repr(e))
+    else:
+        async with AsyncSessionLocal() as db:
+            await JobService(db).mark_succeeded(job.id)
+
+
+async def work(gemini_service: GeminiService) -> None:
+    """Claim and run jobs until cancelled."""
+    last_sweep = 0.0
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                job_service = JobService(db)
+                if time.monotonic() - last_sweep >= STALE_SWEEP_INTERVAL:
+                    await job_service.requeue_stale()
+                    last_sweep = time.monotonic()
+                job = await job_service.claim()
+        except Exception as e:
+            print(f"Job claim error: {e}")
+            job = None
+
+        if job is None:
+            await asyncio.sleep(settings.JOB_POLL_INTERVAL)
+            continue
+        try:
+            await run_job(job, gemini_service)
+        except Exception as e:
+            # Recording the outcome failed (e.g. the DB is unreachable); the
+            # job stays RUNNING and is requeued after JOB_LOCK_TIMEOUT_SECONDS
+            print(f"Job {job.kind} {job.id} outcome error: {e}")
+            await asyncio.sleep(settings.JOB_POLL_INTERVAL)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=max(settings.JOB_WORKERS, 1))
+    args = parser.parse_args()
+
+    gemini_service = GeminiService()
+    try:
+        await asyncio.gather(*(work(gemini_service) for _ in range(args.concurrency)))
+    finally:
+        await gemini_service.close()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,15 +1,75 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
-from app.api import auth, conversation, profile, tasks
+from app.api import auth, conversation, jobs, profile, tasks
+from app.api.deps import get_gemini_service
+from app.api.tasks import today_task_flights
+from app.core.admission import AdmissionControlMiddleware, admission_controller
+from app.core.auth import token_verifier
 from app.core.config import settings
+from app.core.database import engine, pool_metrics, warm_up_pool
+from app.core.llm import LLMTimeoutError, llm_executor
+from app.core.resilience import CircuitOpenError
+from app.jobs.pregenerate_tasks import run_scheduler
+from app.jobs.worker import work
+from app.services import GeminiService
+from app.services.profile_service import profile_cache
+from app.services.prompts import prompt_stats
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open DB connections before taking traffic (Cloud Run cold starts)
+    if settings.DB_WARMUP_CONNECTIONS > 0:
+        try:
+            await warm_up_pool(settings.DB_WARMUP_CONNECTIONS)
+        except Exception as e:
+            print(f"DB warm-up error: {e}")
+
+    # One configured model client per process, injected via get_gemini_service
+    app.state.gemini_service = GeminiService()
+
+    background = [
+        asyncio.create_task(work(app.state.gemini_service))
+        for _ in range(settings.JOB_WORKERS)
+    ]
+    if settings.TASK_PREGEN_ENABLED:
+        background.append(asyncio.create_task(run_scheduler(app.state.gemini_service)))
+
+    yield
+
+    # A job interrupted here stays RUNNING and is requeued after
+    # JOB_LOCK_TIMEOUT_SECONDS
+    for task in background:
+        task.cancel()
+    for task in background:
+        with suppress(asyncio.CancelledError):
+            await task
+    await app.state.gemini_service.close()
+    if token_verifier is not None:
+        await token_verifier.key_store.close()
+    await engine.dispose()
+
 
 app = FastAPI(
     title="OnMe API",
     description="Backend API for OnMe - AI Self-Coaching service",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
+# Admission control (added first so CORS headers wrap its rejections)
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        controller=admission_controller,
+        paths=settings.ADMISSION_PATHS,
+    )
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -19,6 +79,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.exception_handler(LLMTimeoutError)
+async def llm_timeout_handler(request: Request, exc: LLMTimeoutError):
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_handler(request: Request, exc: CircuitOpenError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(round(settings.GEMINI_BREAKER_OPEN_SECONDS))},
+    )
+
+
 # Routers
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(profile.router, prefix="/api/profile", tags=["profile"])
@@ -26,8 +101,22 @@ app.include_router(
     conversation.router, prefix="/api/conversation", tags=["conversation"]
 )
 app.include_router(tasks.router, prefix="/api/tasks", tags=["tasks"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["jobs"])
 
 
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/metrics")
+async def metrics(gemini_service: GeminiService = Depends(get_gemini_service)):
+    return {
+        "llm": llm_executor.stats(),
+        "admission": admission_controller.stats(),
+        "db": pool_metrics.stats(),
+        "task_generation": today_task_flights.stats(),
+        "profile_cache": profile_cache.stats(),
+        "prompts": prompt_stats(),
+        "gemini": gemini_service.stats(),
+    }
@@ -1,16 +1,21 @@
 from app.models.coaching_insight import CoachingInsight, InsightApplication
 from app.models.conversation import Conversation, Message
+from app.models.job import Job, JobStatus
 from app.models.task import ActionLog, DailyTask
 from app.models.user import User
 from app.models.user_profile import UserProfile
+from app.models.user_progress import UserProgress
 
 __all__ = [
     "User",
     "UserProfile",
+    "UserProgress",
     "Conversation",
     "Message",
     "DailyTask",
     "ActionLog",
     "CoachingInsight",
     "InsightApplication",
+    "Job",
+    "JobStatus",
 ]
@@ -1,7 +1,16 @@
 import enum
 import uuid
 
-from sqlalchemy import Boolean, Column, DateTime, Enum, ForeignKey, Integer, String
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+)
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.sql import func
 
@@ -45,6 +54,14 @@ class CoachingInsight(Base):
     """
 
     __tablename__ = "coaching_insights"
+    __table_args__ = (
+        Index(
+            "ix_coaching_insights_target_profile",
+            "target_profile",
+            postgresql_using="gin",
+            postgresql_ops={"target_profile": "jsonb_path_ops"},
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     insight_type = Column(Enum(InsightType), nullable=False)
@@ -64,6 +81,9 @@ class InsightApplication(Base):
     """Log of when insights are applied to users for effect measurement."""
 
     __tablename__ = "insight_applications"
+    __table_args__ = (
+        Index("ix_insight_applications_user_insight", "user_id", "insight_id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
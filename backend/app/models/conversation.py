@@ -1,8 +1,18 @@
 import enum
 import uuid
 
-from sqlalchemy import Column, DateTime, Enum, ForeignKey, Text
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Index,
+    Integer,
+    Text,
+    text,
+)
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -22,6 +32,15 @@ class MessageRole(str, enum.Enum):
 
 class Conversation(Base):
     __tablename__ = "conversations"
+    __table_args__ = (
+        Index("ix_conversations_user_type_created", "user_id", "type", "created_at"),
+        Index(
+            "ix_conversations_user_type_active",
+            "user_id",
+            "type",
+            postgresql_where=text("ended_at IS NULL"),
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
@@ -29,6 +48,22 @@ class Conversation(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     ended_at = Column(DateTime(timezone=True), nullable=True)
 
+    # Rolling summary of the oldest `summarized_message_count` messages,
+    # i.e. every message created up to `summarized_until`
+    summary = Column(Text, nullable=True)
+    summarized_message_count = Column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    summarized_until = Column(DateTime(timezone=True), nullable=True)
+
+    # Incremental analysis checkpoint: the trait/depth estimate from the
+    # `analysis_message_count` messages flagged `analyzed` (see
+    # ConversationService.analyze_new_messages). It is merged into the
+    # profile once, when the conversation has ended, at `analysis_applied_at`.
+    analysis = Column(JSONB, nullable=True)
+    analysis_message_count = Column(Integer, nullable=True)
+    analysis_applied_at = Column(DateTime(timezone=True), nullable=True)
+
     # Relationships
     user = relationship("User", back_populates="conversations")
     messages = relationship(
@@ -38,6 +73,14 @@ class Conversation(Base):
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_conversation_created", "conversation_id", "created_at"),
+        Index(
+            "ix_messages_conversation_unanalyzed",
+            "conversation_id",
+            postgresql_where=text("NOT analyzed"),
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     conversation_id = Column(
@@ -46,6 +89,8 @@ class Message(Base):
     role = Column(Enum(MessageRole), nullable=False)
     content = Column(Text, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Included in the conversation's analysis checkpoint
+    analyzed = Column(Boolean, nullable=False, default=False, server_default="false")
 
     # Relationships
     conversation = relationship("Conversation", back_populates="messages")
@@ -8,8 +8,11 @@ from sqlalchemy import (
     DateTime,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     String,
+    UniqueConstraint,
+    text,
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -29,6 +32,15 @@ class DailyTask(Base):
     """Daily task assigned to user."""
 
     __tablename__ = "daily_tasks"
+    __table_args__ = (
+        UniqueConstraint("user_id", "date", name="uq_daily_tasks_user_date"),
+        Index(
+            "ix_daily_tasks_user_completed_date",
+            "user_id",
+            "date",
+            postgresql_where=text("completed IS true"),
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
@@ -48,6 +60,7 @@ class ActionLog(Base):
     """Log of user actions for analysis."""
 
     __tablename__ = "action_logs"
+    __table_args__ = (Index("ix_action_logs_user_logged", "user_id", "logged_at"),)
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
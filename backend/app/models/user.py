@@ -24,6 +24,7 @@ class User(Base):
 
     # Relationships
     profile = relationship("UserProfile", back_populates="user", uselist=False)
+    progress = relationship("UserProgress", back_populates="user", uselist=False)
     conversations = relationship("Conversation", back_populates="user")
     daily_tasks = relationship("DailyTask", back_populates="user")
     action_logs = relationship("ActionLog", back_populates="user")
@@ -0,0 +1,38 @@
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Integer
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class UserProgress(Base):
+    """
+    Per-user task progress counters, maintained by TaskService writes.
+
+    current_streak is the length of the completion streak ending at
+    last_completed_date; it counts as the live streak only while that date is
+    today or yesterday.
+
+    weekly_buckets: {
+        "2025-01-15": {"completed": 1, "total": 1},
+        "2025-01-16": {"completed": 0, "total": 1}
+    }
+    (only the last 7 days, plus any pre-generated future dates, are kept)
+    """
+
+    __tablename__ = "user_progress"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    current_streak = Column(Integer, nullable=False, default=0, server_default="0")
+    longest_streak = Column(Integer, nullable=False, default=0, server_default="0")
+    last_completed_date = Column(Date, nullable=True)
+    total_tasks = Column(Integer, nullable=False, default=0, server_default="0")
+    total_completed = Column(Integer, nullable=False, default=0, server_default="0")
+    weekly_buckets = Column(JSONB, nullable=False, default={}, server_default="{}")
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+    # Relationships
+    user = relationship("User", back_populates="progress")
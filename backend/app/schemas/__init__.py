@@ -1,13 +1,17 @@
 from app.schemas.conversation import (
     ConversationCreate,
     ConversationResponse,
+    EndConversationResponse,
     MessageCreate,
     MessageResponse,
     SendMessageRequest,
     SendMessageResponse,
 )
+from app.schemas.job import JobResponse
 from app.schemas.profile import (
     BehavioralPatterns,
+    ConversationAnalysis,
+    ConversationDepth,
     ConversationInsight,
     MotivationDrivers,
     StressResponse,
@@ -33,8 +37,11 @@ __all__ = [
     "StressResponse",
     "BehavioralPatterns",
     "ConversationInsight",
+    "ConversationAnalysis",
+    "ConversationDepth",
     "ConversationCreate",
     "ConversationResponse",
+    "EndConversationResponse",
     "MessageCreate",
     "MessageResponse",
     "SendMessageRequest",
@@ -43,4 +50,5 @@ __all__ = [
     "TaskCompleteRequest",
     "ProgressStatsResponse",
     "WeeklyStat",
+    "JobResponse",
 ]
@@ -47,6 +47,12 @@ class ConversationResponse(BaseModel):
         from_attributes = True
 
 
+class EndConversationResponse(ConversationResponse):
+    # Set when this call ended the conversation and queued its analysis;
+    # poll GET /api/jobs/{analysis_job_id} for the result
+    analysis_job_id: UUID | None = None
+
+
 class SendMessageRequest(BaseModel):
     conversation_id: UUID | None = None
     type: ConversationType
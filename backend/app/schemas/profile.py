@@ -1,7 +1,16 @@
 from datetime import datetime
+from typing import Annotated
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import AfterValidator, BaseModel
+
+
+def _clamp_score(value: float) -> float:
+    return min(max(value, 0.0), 1.0)
+
+
+# Model-produced trait score, clamped into [0, 1]
+Score = Annotated[float, AfterValidator(_clamp_score)]
 
 
 class ThinkingStyle(BaseModel):
@@ -62,3 +71,37 @@ class UserProfileUpdate(BaseModel):
     values: list[str] | None = None
     strengths_discovered: list[str] | None = None
     growth_areas: list[str] | None = None
+
+
+class AnalyzedThinkingStyle(BaseModel):
+    logical_intuitive: Score | None = None
+    decisive_deliberate: Score | None = None
+    optimistic_cautious: Score | None = None
+
+
+class AnalyzedMotivationDrivers(BaseModel):
+    achievement: Score | None = None
+    recognition: Score | None = None
+    growth: Score | None = None
+    stability: Score | None = None
+
+
+class ConversationDepth(BaseModel):
+    self_disclosure: Score | None = None
+    specificity: Score | None = None
+    insight_expression: Score | None = None
+
+
+class ConversationAnalysis(BaseModel):
+    """
+    Traits and depth scores extracted from a conversation in one pass.
+    Unset trait and depth scores are left unmerged; a conversation without
+    depth scores records no depth score (rather than a neutral one).
+    """
+
+    thinking_style: AnalyzedThinkingStyle = AnalyzedThinkingStyle()
+    motivation_drivers: AnalyzedMotivationDrivers = AnalyzedMotivationDrivers()
+    values: list[str] = []
+    strengths_discovered: list[str] = []
+    insight: str | None = None
+    depth: ConversationDepth | None = None
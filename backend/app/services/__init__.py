@@ -1,5 +1,6 @@
 from app.core.config import settings
 from app.services.conversation_service import ConversationService
+from app.services.job_service import JobService
 from app.services.profile_service import ProfileService
 from app.services.task_service import TaskService
 from app.services.user_service import UserService
@@ -15,5 +16,6 @@ __all__ = [
     "ProfileService",
     "ConversationService",
     "TaskService",
+    "JobService",
     "GeminiService",
 ]
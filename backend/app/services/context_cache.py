@@ -0,0 +1,169 @@
+"""
+Provider-side caching of static system instructions.
+
+The coaching instructions are identical for every user of a conversation
+type, so they are uploaded once per PromptTemplate version as cached content
+and each turn only sends the per-user part. Templates below the provider's
+minimum cacheable size (`min_tokens`) are never uploaded. When caching is
+disabled, the template is too small, or the provider rejects the cache, the
+template falls back to a model built once with the same
+`system_instruction`; a rejected creation is retried after one TTL.
+"""
+
+import asyncio
+import time
+from typing import Any, Protocol
+
+from app.services.conversation_context import estimate_tokens
+from app.services.prompts import PromptTemplate
+
+# Re-create cached content this many seconds before it expires
+REFRESH_MARGIN = 60
+
+
+class ContextCacheAPI(Protocol):
+    async def create(self, system_instruction: str, ttl: float, name: str) -> Any:
+        """Upload cached content and return a provider handle."""
+        ...
+
+    async def delete(self, handle: Any) -> None: ...
+
+    def model(self, handle: Any) -> Any:
+        """A model that uses the cached content."""
+        ...
+
+    def fallback_model(self, system_instruction: str) -> Any:
+        """A model sending `system_instruction` with every request."""
+        ...
+
+
+class FakeContextCacheAPI:
+    """In-memory stand-in for the provider cache API, for tests."""
+
+    def __init__(self, min_tokens: int = 0):
+        self.min_tokens = min_tokens
+        self.contents: dict[str, str] = {}
+        self.created = 0
+        self.deleted = 0
+
+    async def create(self, system_instruction: str, ttl: float, name: str) -> str:
+        if estimate_tokens(system_instruction) < self.min_tokens:
+            raise ValueError("Cached content is below the minimum token count")
+        self.created += 1
+        handle = f"cachedContents/{name}-{self.created}"
+        self.contents[handle] = system_instruction
+        return handle
+
+    async def delete(self, handle: str) -> None:
+        self.deleted += 1
+        self.contents.pop(handle, None)
+
+    def model(self, handle: str) -> tuple[str, str]:
+        return ("cached", handle)
+
+    def fallback_model(self, system_instruction: str) -> tuple[str, str]:
+        return ("system_instruction", system_instruction)
+
+
+class ContextCacheManager:
+    """Maps each template version to a model with its instructions attached."""
+
+    def __init__(
+        self,
+        api: ContextCacheAPI,
+        ttl: float,
+        enabled: bool = True,
+        min_tokens: int = 0,
+    ):
+        self.api = api
+        self.ttl = ttl
+        self.enabled = enabled
+        self.min_tokens = min_tokens
+        # (template name, version) -> (handle, expires_at, model)
+        self._entries: dict[tuple[str, str], tuple[Any, float, Any]] = {}
+        self._fallbacks: dict[tuple[str, str], Any] = {}
+        self._retry_at: dict[tuple[str, str], float] = {}
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.creates = 0
+        self.fallbacks = 0
+        self.errors = 0
+
+    async def model_for(self, template: PromptTemplate) -> Any:
+        key = (template.name, template.version)
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() < entry[1] - REFRESH_MARGIN:
+            self.hits += 1
+            return entry[2]
+
+        if (
+            self.enabled
+            and self._cacheable(template)
+            and time.monotonic() >= self._retry_at.get(key, 0.0)
+        ):
+            async with self._lock:
+                # Another coroutine may have created it while we waited
+                entry = self._entries.get(key)
+                if entry is None or time.monotonic() >= entry[1] - REFRESH_MARGIN:
+                    entry = await self._create(key, template)
+            if entry is not None:
+                self.hits += 1
+                return entry[2]
+
+        self.fallbacks += 1
+        if key not in self._fallbacks:
+            self._fallbacks[key] = self.api.fallback_model(template.instructions)
+        return self._fallbacks[key]
+
+    def _cacheable(self, template: PromptTemplate) -> bool:
+        """Whether the instructions meet the provider's minimum size."""
+        return estimate_tokens(template.instructions) >= self.min_tokens
+
+    async def _create(
+        self,
+        key: tuple[str, str],
+        template: PromptTemplate,
+    ) -> tuple[Any, float, Any] | None:
+        try:
+            handle = await self.api.create(
+                template.instructions, self.ttl, f"{template.name}-{template.version}"
+            )
+        except Exception as e:
+            print(f"Context cache error for {template.name}: {e}")
+            self.errors += 1
+            self._retry_at[key] = time.monotonic() + self.ttl
+            return None
+
+        self.creates += 1
+        previous = self._entries.get(key)
+        entry = (handle, time.monotonic() + self.ttl, self.api.model(handle))
+        self._entries[key] = entry
+        # Drop entries of older versions of the same template
+        for old_key in [k for k in self._entries if k[0] == key[0] and k != key]:
+            await self._delete(self._entries.pop(old_key)[0])
+        if previous is not None:
+            await self._delete(previous[0])
+        return entry
+
+    async def _delete(self, handle: Any) -> None:
+        try:
+            await self.api.delete(handle)
+        except Exception as e:
+            # Unreachable entries simply expire on the provider side
+            print(f"Context cache delete error: {e}")
+
+    async def close(self) -> None:
+        for handle, _, _ in self._entries.values():
+            await self._delete(handle)
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "min_tokens": self.min_tokens,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "creates": self.creates,
+            "fallbacks": self.fallbacks,
+            "errors": self.errors,
+        }
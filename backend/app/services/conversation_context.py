@@ -0,0 +1,58 @@
+"""
+Bounded prompt context for long conversations.
+
+Only the last CONTEXT_WINDOW_TURNS turns are sent verbatim. Older messages
+are folded into a rolling summary stored on the conversation, refreshed once
+CONTEXT_SUMMARY_INTERVAL more messages have fallen out of the window, and the
+verbatim part is additionally trimmed to a per-type token budget.
+"""
+
+from app.core.config import settings
+
+SUMMARY_ROLE = "summary"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token estimate: one token per 3 UTF-8 bytes, i.e. ~1 token per CJK
+    character (3 bytes each) and ~1 per 3 ASCII characters.
+    """
+    return len(text.encode("utf-8")) // 3 + 1
+
+
+def window_size() -> int:
+    """Number of messages kept verbatim (a turn is a user + assistant pair)."""
+    return settings.CONTEXT_WINDOW_TURNS * 2
+
+
+def messages_to_summarize(unsummarized_count: int) -> int:
+    """How many of the oldest unsummarised messages to fold in now (0 = none)."""
+    if unsummarized_count < window_size() + settings.CONTEXT_SUMMARY_INTERVAL:
+        return 0
+    return unsummarized_count - window_size()
+
+
+def build_context(
+    conversation_type: str,
+    summary: str | None,
+    messages: list[dict],
+) -> list[dict]:
+    """Newest messages within the token budget, preceded by the summary."""
+    budget = settings.CONTEXT_TOKEN_BUDGET.get(conversation_type, 2000)
+    if summary:
+        budget -= estimate_tokens(summary)
+
+    kept: list[dict] = []
+    for message in reversed(
+        messages[-window_size() - settings.CONTEXT_SUMMARY_INTERVAL :]
+    ):
+        budget -= estimate_tokens(message["content"])
+        # Always keep the latest message, even if it alone exceeds the budget
+        if budget < 0 and kept:
+            break
+        kept.append(message)
+    kept.reverse()
+
+    if summary:
+        kept.insert(0, {"role": SUMMARY_ROLE, "content": summary})
+    return kept
@@ -1,11 +1,22 @@
-from datetime import datetime
-from uuid import UUID
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING
+from uuid import UUID, uuid4
 
-from sqlalchemy import select
+from sqlalchemy import func, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app.core.config import settings
+from app.models.coaching_insight import InsightApplication
 from app.models.conversation import Conversation, ConversationType, Message, MessageRole
+from app.services.conversation_context import (
+    build_context,
+    messages_to_summarize,
+    window_size,
+)
+
+if TYPE_CHECKING:
+    from app.services.gemini_service import GeminiService
 
 
 class ConversationService:
@@ -30,8 +41,8 @@ class ConversationService:
             type=conv_type,
         )
         self.db.add(conversation)
+        # Server defaults come back via INSERT ... RETURNING; no refresh needed
         await self.db.commit()
-        await self.db.refresh(conversation)
         return conversation
 
     async def add_message(
@@ -46,16 +57,14 @@ class ConversationService:
             content=content,
         )
         self.db.add(message)
+        # created_at comes back via INSERT ... RETURNING; no refresh needed
         await self.db.commit()
-        await self.db.refresh(message)
         return message
 
-    async def end_conversation(self, conversation_id: UUID) -> Conversation | None:
-        conversation = await self.get_by_id(conversation_id)
-        if conversation:
-            conversation.ended_at = datetime.utcnow()
-            await self.db.commit()
-            await self.db.refresh(conversation)
+    async def end_conversation(self, conversation: Conversation) -> Conversation:
+        """Mark a loaded conversation as ended, committing pending writes."""
+        conversation.ended_at = datetime.now(UTC)
+        await self.db.commit()
         return conversation
 
     async def get_active_conversation(
@@ -89,3 +98,242 @@ class ConversationService:
             {"role": msg.role.value, "content": msg.content}
             for msg in conversation.messages
         ]
+
+    async def get_for_user(
+        self,
+        conversation_id: UUID,
+        user_id: UUID,
+    ) -> Conversation | None:
+        """Load a conversation row (without its messages) owned by the user."""
+        result = await self.db.execute(
+            select(Conversation).where(
+                Conversation.id == conversation_id,
+                Conversation.user_id == user_id,
+            )
+        )
+        return result.scalar_one_or_none()
+
+    async def start_turn(
+        self,
+        conversation: Conversation,
+        content: str,
+    ) -> list[dict]:
+        """
+        Store the user's message and return the prompt history.
+
+        The INSERT runs as a data-modifying CTE of the narrow (role, content)
+        history query, so both happen in a single statement. The history is
+        bounded: rolling summary plus the most recent unsummarised messages.
+        """
+        new_message = (
+            insert(Message)
+            .values(
+                id=uuid4(),
+                conversation_id=conversation.id,
+                role=MessageRole.USER,
+                content=content,
+            )
+            .returning(Message.id)
+            .cte("new_message")
+        )
+        query = (
+            select(Message.role, Message.content)
+            .where(Message.conversation_id == conversation.id)
+            .order_by(Message.created_at.desc())
+            .limit(window_size() + settings.CONTEXT_SUMMARY_INTERVAL)
+            .add_cte(new_message)
+        )
+        if conversation.summarized_until is not None:
+            query = query.where(Message.created_at > conversation.summarized_until)
+
+        # The CTE's row is not visible to the outer query; append it ourselves
+        result = await self.db.execute(query)
+        messages = [
+            {"role": role.value, "content": content}
+            for role, content in reversed(result.all())
+        ]
+        messages.append({"role": MessageRole.USER.value, "content": content})
+        await self.db.commit()
+
+        return build_context(conversation.type.value, conversation.summary, messages)
+
+    async def refresh_summary(
+        self,
+        conversation_id: UUID,
+        gemini_service: "GeminiService",
+    ) -> bool:
+        """Fold messages that left the context window into the rolling summary."""
+        conversation = await self.db.get(Conversation, conversation_id)
+        if conversation is None:
+            return False
+
+        unsummarized = Message.conversation_id == conversation_id
+        if conversation.summarized_until is not None:
+            unsummarized &= Message.created_at > conversation.summarized_until
+
+        result = await self.db.execute(
+            select(func.count(Message.id)).where(unsummarized)
+        )
+        count = messages_to_summarize(result.scalar() or 0)
+        if count == 0:
+            return False
+
+        result = await self.db.execute(
+            select(Message.role, Message.content, Message.created_at)
+            .where(unsummarized)
+            .order_by(Message.created_at)
+            .limit(count)
+        )
+        rows = result.all()
+        messages = [
+            {"role": role.value, "content": content} for role, content, _ in rows
+        ]
+        summary = await gemini_service.summarize_conversation(
+            conversation.summary, messages
+        )
+
+        # Only apply if no concurrent refresh got there first
+        result = await self.db.execute(
+            update(Conversation)
+            .where(
+                Conversation.id == conversation_id,
+                Conversation.summarized_message_count
+                == conversation.summarized_message_count,
+            )
+            .values(
+                summary=summary,
+                summarized_message_count=Conversation.summarized_message_count
+                + len(rows),
+                summarized_until=rows[-1][2],
+            )
+        )
+        await self.db.commit()
+        return result.rowcount == 1
+
+    async def count_unanalyzed(self, conversation: Conversation) -> int:
+        result = await self.db.execute(
+            select(func.count(Message.id)).where(
+                Message.conversation_id == conversation.id,
+                Message.analyzed.is_(False),
+            )
+        )
+        return result.scalar() or 0
+
+    async def analyze_new_messages(
+        self,
+        conversation: Conversation,
+        gemini_service: "GeminiService",
+    ) -> dict | None:
+        """
+        Bring the conversation's analysis checkpoint up to date.
+
+        Only messages not yet analysed are sent, together with the previous
+        estimate for this conversation; the model returns the estimate
+        updated with them. Messages are flagged individually rather than by a
+        created_at or sequence cut-off, since a message can commit after a
+        later-inserted one. The checkpoint is written but not committed.
+
+        Returns the estimate covering every analysed message of the
+        conversation (the stored one when there is nothing new), None if the
+        conversation has no messages, or {} if the model fails or a
+        concurrent pass moved the checkpoint first (retry later).
+        """
+        result = await self.db.execute(
+            select(Message.id, Message.role, Message.content)
+            .where(
+                Message.conversation_id == conversation.id,
+                Message.analyzed.is_(False),
+            )
+            .order_by(Message.created_at)
+        )
+        rows = result.all()
+        if not rows:
+            return conversation.analysis
+
+        messages = [
+            {"role": role.value, "content": content} for _, role, content in rows
+        ]
+        analysis = await gemini_service.analyze_conversation(
+            messages, conversation.analysis
+        )
+        if not analysis:
+            return {}
+
+        # Only apply if no concurrent pass got there first
+        checkpoint = Conversation.analysis_message_count
+        result = await self.db.execute(
+            update(Conversation)
+            .where(
+                Conversation.id == conversation.id,
+                checkpoint.is_(None)
+                if conversation.analysis_message_count is None
+                else checkpoint == conversation.analysis_message_count,
+            )
+            .values(
+                analysis=analysis,
+                analysis_message_count=func.coalesce(checkpoint, 0) + len(rows),
+            )
+            .returning(Conversation.analysis_message_count)
+            .execution_options(synchronize_session=False)
+        )
+        count = result.scalar_one_or_none()
+        if count is None:
+            return {}
+        await self.db.execute(
+            update(Message)
+            .where(Message.id.in_([message_id for message_id, _, _ in rows]))
+            .values(analyzed=True)
+            .execution_options(synchronize_session=False)
+        )
+        conversation.analysis = analysis
+        conversation.analysis_message_count = count
+        return analysis
+
+    async def mark_analysis_applied(self, conversation: Conversation) -> bool:
+        """
+        Mark the analysis as merged into the profile, without committing.
+
+        Returns False if it already was; called in the same transaction as
+        the merge, so a retried or duplicate job cannot apply it twice.
+        """
+        result = await self.db.execute(
+            update(Conversation)
+            .where(
+                Conversation.id == conversation.id,
+                Conversation.analysis_applied_at.is_(None),
+            )
+            .values(analysis_applied_at=func.now())
+            .returning(Conversation.analysis_applied_at)
+            .execution_options(synchronize_session=False)
+        )
+        applied_at = result.scalar_one_or_none()
+        if applied_at is None:
+            return False
+        conversation.analysis_applied_at = applied_at
+        return True
+
+    async def record_depth_score(
+        self,
+        conversation: Conversation,
+        depth: dict,
+    ) -> int:
+        """
+        Set conversation_depth_score (0-100, the mean of the depth scores) on
+        the user's unmeasured insight applications made before the
+        conversation ended, without committing. Returns the number of
+        applications updated.
+        """
+        scores = [v for v in depth.values() if isinstance(v, int | float)]
+        if not scores or conversation.ended_at is None:
+            return 0
+
+        result = await self.db.execute(
+            update(InsightApplication)
+            .where(
+                InsightApplication.user_id == conversation.user_id,
+                InsightApplication.conversation_depth_score.is_(None),
+                InsightApplication.applied_at <= conversation.ended_at,
+            )
+            .values(conversation_depth_score=round(sum(scores) / len(scores) * 100))
+        )
+        return result.rowcount
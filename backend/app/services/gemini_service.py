@@ -1,14 +1,139 @@
-import json
+import asyncio
+import hashlib
+from collections.abc import AsyncIterator, Callable
+from contextlib import AsyncExitStack
+from datetime import timedelta
 
 import google.generativeai as genai
+from google.generativeai import caching
 
+from app.core.cache import VariantCache
 from app.core.config import settings
+from app.core.llm import llm_executor
+from app.core.resilience import CircuitBreaker, ResilientCaller
+from app.schemas.profile import ConversationAnalysis
+from app.services import prompts
+from app.services.context_cache import ContextCacheManager
+from app.services.conversation_context import SUMMARY_ROLE
+from app.services.mock_gemini_service import MockGeminiService
+from app.services.structured_output import StructuredOutputParser, extract_json
+
+MODEL_NAME = "gemini-1.5-flash"
+# HTTP statuses of refused requests that are still worth retrying
+RETRYABLE_CLIENT_ERRORS = (408, 429)
+
+
+def is_upstream_failure(error: Exception) -> bool:
+    """
+    Whether an error reflects Gemini's health, i.e. is retried and counts
+    towards the circuit breaker. Blocked prompts, response.text's ValueError
+    on a safety-blocked or empty response, and 4xx rejections of the request
+    (e.g. 400 InvalidArgument) would fail the same way on every attempt.
+    """
+    if isinstance(
+        error,
+        ValueError
+        | genai.types.BlockedPromptException
+        | genai.types.StopCandidateException,
+    ):
+        return False
+    code = getattr(error, "code", None)  # google.api_core HTTP status
+    return not (
+        isinstance(code, int)
+        and 400 <= code < 500
+        and code not in RETRYABLE_CLIENT_ERRORS
+    )
+
+
+class GeminiContextCacheAPI:
+    """Gemini cached-content API (ContextCacheAPI) on top of the SDK."""
+
+    async def create(
+        self,
+        system_instruction: str,
+        ttl: float,
+        name: str,
+    ) -> caching.CachedContent:
+        return await asyncio.to_thread(
+            caching.CachedContent.create,
+            model=settings.GEMINI_CONTEXT_CACHE_MODEL,
+            display_name=name,
+            system_instruction=system_instruction,
+            ttl=timedelta(seconds=ttl),
+        )
+
+    async def delete(self, handle: caching.CachedContent) -> None:
+        await asyncio.to_thread(handle.delete)
+
+    def model(self, handle: caching.CachedContent) -> genai.GenerativeModel:
+        return genai.GenerativeModel.from_cached_content(cached_content=handle)
+
+    def fallback_model(self, system_instruction: str) -> genai.GenerativeModel:
+        return genai.GenerativeModel(MODEL_NAME, system_instruction=system_instruction)
 
 
 class GeminiService:
+    """
+    Gemini client. Create one per process (see app.main lifespan) and inject
+    it with the get_gemini_service dependency; construction configures the
+    SDK and builds the model, which should not happen per request.
+
+    Model calls run under a ResilientCaller (per-operation deadlines,
+    jittered retries, optional hedging, a shared circuit breaker). When a
+    coaching or task call fails or the breaker is open, the response comes
+    from MockGeminiService's templates instead (degraded mode); analysis and
+    summaries fail so their callers retry later.
+    """
+
     def __init__(self):
         genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel("gemini-1.5-flash")
+        self.model = genai.GenerativeModel(MODEL_NAME)
+        self.context_cache = ContextCacheManager(
+            GeminiContextCacheAPI(),
+            ttl=settings.GEMINI_CONTEXT_CACHE_TTL_SECONDS,
+            enabled=settings.GEMINI_CONTEXT_CACHE_ENABLED,
+            min_tokens=settings.GEMINI_CONTEXT_CACHE_MIN_TOKENS,
+        )
+        self.resilience = ResilientCaller(
+            CircuitBreaker(
+                window=settings.GEMINI_BREAKER_WINDOW,
+                min_calls=settings.GEMINI_BREAKER_MIN_CALLS,
+                failure_rate=settings.GEMINI_BREAKER_FAILURE_RATE,
+                slow_call_seconds=settings.GEMINI_BREAKER_SLOW_CALL_SECONDS,
+                open_seconds=settings.GEMINI_BREAKER_OPEN_SECONDS,
+            ),
+            retries=settings.GEMINI_RETRIES,
+            retry_base=settings.GEMINI_RETRY_BASE_SECONDS,
+            hedge=settings.GEMINI_HEDGE_ENABLED,
+            hedge_min_samples=settings.GEMINI_HEDGE_MIN_SAMPLES,
+            is_failure=is_upstream_failure,
+        )
+        self.fallback = MockGeminiService()
+        self.fallbacks: dict[str, int] = {"chat": 0, "task": 0}
+        self.analysis_parser = StructuredOutputParser(ConversationAnalysis)
+        self.task_cache = (
+            VariantCache(
+                max_size=settings.TASK_CACHE_MAX_KEYS,
+                ttl=settings.TASK_CACHE_TTL_SECONDS,
+                variants=settings.TASK_CACHE_VARIANTS,
+            )
+            if settings.TASK_CACHE_ENABLED
+            else None
+        )
+
+    async def close(self) -> None:
+        """Let in-flight calls finish before the process exits."""
+        await llm_executor.drain()
+        await self.context_cache.close()
+
+    def stats(self) -> dict:
+        return {
+            "resilience": self.resilience.stats(),
+            "fallbacks": self.fallbacks,
+            "context_cache": self.context_cache.stats(),
+            "task_cache": self.task_cache.stats() if self.task_cache else None,
+            "analysis_output": self.analysis_parser.stats(),
+        }
 
     async def generate_onboarding_response(
         self,
@@ -16,26 +141,34 @@ class GeminiService:
         user_profile: dict,
     ) -> str:
         """Generate response for onboarding conversation."""
-        system_prompt = """あなたは学生向けのAIコーチです。
-フラットで親しみやすい友達のような口調で話してください。
-
-オンボーディングの目的:
-- ユーザーの価値観、興味、ストレス耐性を理解する
-- 10-15分で完了できる自然な会話を行う
-- 質問は選択式と短文を組み合わせる
-
-重要なルール:
-- 他人との比較は絶対にしない
-- 評価や判断をしない
-- 押し付けがましくならない
-- 相手のペースに合わせる
-
-現在のユーザープロファイル:
-""" + json.dumps(user_profile, ensure_ascii=False, indent=2)
+        model, prompt = await self._onboarding_request(
+            conversation_history, user_profile
+        )
+        try:
+            return await self._generate(prompt, model)
+        except Exception as e:
+            self._record_fallback("chat", e)
+            return await self.fallback.generate_onboarding_response(
+                conversation_history, user_profile
+            )
 
-        messages = self._format_messages(conversation_history, system_prompt)
-        response = await self._generate(messages)
-        return response
+    async def stream_onboarding_response(
+        self,
+        conversation_history: list[dict],
+        user_profile: dict,
+    ) -> AsyncIterator[str]:
+        """Stream response chunks for onboarding conversation."""
+        model, prompt = await self._onboarding_request(
+            conversation_history, user_profile
+        )
+        async for chunk in self._stream_or_fallback(
+            prompt,
+            model,
+            lambda: self.fallback.stream_onboarding_response(
+                conversation_history, user_profile
+            ),
+        ):
+            yield chunk
 
     async def generate_daily_coach_response(
         self,
@@ -44,142 +177,357 @@ class GeminiService:
         today_task: dict | None,
     ) -> str:
         """Generate response for daily coaching conversation."""
-        system_prompt = f"""あなたは学生向けのAIコーチです。
-フラットで親しみやすい友達のような口調で話してください。
-
-デイリーコーチの目的:
-- 今日の状態確認（気分・余裕度）
-- 昨日の行動の簡単な振り返り
-- 今日やる「1タスク」の確認
-
-重要なルール:
-- 1日5分以内で完結する会話を目指す
-- タスクは「失敗しにくい粒度」に分解されている
-- 未実行でも責めない
-- 「できなかった理由」を分析材料として使う
-
-ユーザープロファイル:
-{json.dumps(user_profile, ensure_ascii=False, indent=2)}
-
-今日のタスク:
-{json.dumps(today_task, ensure_ascii=False, indent=2) if today_task else "未設定"}
-"""
+        model, prompt = await self._daily_coach_request(
+            conversation_history, user_profile, today_task
+        )
+        try:
+            return await self._generate(prompt, model)
+        except Exception as e:
+            self._record_fallback("chat", e)
+            return await self.fallback.generate_daily_coach_response(
+                conversation_history, user_profile, today_task
+            )
 
-        messages = self._format_messages(conversation_history, system_prompt)
-        response = await self._generate(messages)
-        return response
+    async def stream_daily_coach_response(
+        self,
+        conversation_history: list[dict],
+        user_profile: dict,
+        today_task: dict | None,
+    ) -> AsyncIterator[str]:
+        """Stream response chunks for daily coaching conversation."""
+        model, prompt = await self._daily_coach_request(
+            conversation_history, user_profile, today_task
+        )
+        async for chunk in self._stream_or_fallback(
+            prompt,
+            model,
+            lambda: self.fallback.stream_daily_coach_response(
+                conversation_history, user_profile, today_task
+            ),
+        ):
+            yield chunk
+
+    async def _onboarding_request(
+        self,
+        conversation_history: list[dict],
+        user_profile: dict,
+    ) -> tuple[genai.GenerativeModel, str]:
+        """Model carrying the cached instructions, plus the per-user prompt."""
+        model = await self.context_cache.model_for(prompts.ONBOARDING)
+        context = prompts.ONBOARDING.render_body(
+            profile=prompts.encode_profile(user_profile)
+        )
+        return model, self._format_messages(conversation_history, context)
+
+    async def _daily_coach_request(
+        self,
+        conversation_history: list[dict],
+        user_profile: dict,
+        today_task: dict | None,
+    ) -> tuple[genai.GenerativeModel, str]:
+        model = await self.context_cache.model_for(prompts.DAILY_COACH)
+        context = prompts.DAILY_COACH.render_body(
+            profile=prompts.encode_profile(user_profile),
+            task=prompts.encode_task(today_task),
+        )
+        return model, self._format_messages(conversation_history, context)
 
     async def analyze_conversation(
         self,
         conversation_history: list[dict],
+        previous: dict | None = None,
     ) -> dict:
-        """Analyze conversation to extract user characteristics."""
-        prompt = """以下の会話から、ユーザーの特徴を抽出してJSON形式で返してください:
-
-分析項目:
-- thinking_style: 思考スタイル
-  - logical_intuitive: 0.0(直感的)〜1.0(論理的)
-  - decisive_deliberate: 0.0(即決型)〜1.0(熟考型)
-  - optimistic_cautious: 0.0(楽観的)〜1.0(慎重派)
-- motivation_drivers: モチベーション源
-  - achievement: 達成感 (0.0〜1.0)
-  - recognition: 承認 (0.0〜1.0)
-  - growth: 成長 (0.0〜1.0)
-  - stability: 安定 (0.0〜1.0)
-- values: 表出された価値観キーワード (配列)
-- strengths_discovered: 発見された強み (配列)
-- insight: この会話から得られた洞察 (文字列)
-
-会話:
-""" + json.dumps(conversation_history, ensure_ascii=False)
+        """
+        Extract user characteristics and depth scores in one call.
+
+        `previous` is the estimate so far (e.g. from earlier messages of the
+        conversation); only `conversation_history` needs to hold new messages,
+        and the result is the estimate updated with them. Returns {} when the
+        model fails or gives no usable JSON.
+        """
+        prompt = prompts.ANALYSIS.render(
+            previous=prompts.encode_profile(previous or {}),
+            conversation=prompts.encode_messages(conversation_history),
+        )
 
         try:
-            response = self.model.generate_content(prompt)
-            # Parse JSON from response
-            text = response.text
-            # Extract JSON from code block if present
-            if "```json" in text:
-                text = text.split("```json")[1].split("```")[0]
-            elif "```" in text:
-                text = text.split("```")[1].split("```")[0]
-            return json.loads(text.strip())
+            text = await self._generate(
+                prompt,
+                generation_config=self.analysis_parser.generation_config,
+                operation="analysis",
+            )
         except Exception as e:
             print(f"Analysis error: {e}")
             return {}
 
+        analysis = self.analysis_parser.parse(text)
+        if analysis is None:
+            print("Analysis error: no valid JSON object in response")
+            return {}
+        return analysis.model_dump(exclude_none=True)
+
+    async def summarize_conversation(
+        self,
+        previous_summary: str | None,
+        messages: list[dict],
+    ) -> str:
+        """Fold older messages into the rolling conversation summary."""
+        prompt = prompts.SUMMARY.render(
+            summary=previous_summary or "なし",
+            messages=prompts.encode_messages(messages),
+        )
+
+        response = await self._generate(prompt, operation="summary")
+        return response.strip()
+
     async def generate_task(
         self,
         user_profile: dict,
         category: str,
+        fallback: bool = True,
     ) -> str:
-        """Generate a personalized daily task."""
-        prompt = f"""以下のユーザープロファイルに基づいて、今日のタスクを1つ生成してください。
-
-ユーザープロファイル:
-{json.dumps(user_profile, ensure_ascii=False, indent=2)}
-
-カテゴリ: {category}
-
-ルール:
-- 必ず失敗しにくい粒度に分解する
-- 「英語を30分」ではなく「英単語10個を見る」のように具体的に
-- 5分以内で完了できるタスク
-- ユーザーの特性に合わせてカスタマイズ
-
-タスク内容のみを返してください（説明不要）:"""
-
-        response = self.model.generate_content(prompt)
-        return response.text.strip()
-
-    async def evaluate_conversation_depth(
+        """
+        Generate a personalized daily task.
+
+        Tasks are cached by normalised prompt (quantised profile, category and
+        template version), so users with matching profiles, e.g. new users,
+        share a small pool of generated tasks instead of each calling Gemini.
+        If the call fails, a template task is returned (and not cached)
+        unless `fallback` is False.
+        """
+        profile, key = self._task_cache_key(user_profile, category)
+        cached = self._cached_task(key)
+        if cached is not None:
+            return cached
+
+        prompt = prompts.TASK.render(profile=profile, category=category)
+        try:
+            task = (await self._generate(prompt, operation="task")).strip()
+        except Exception as e:
+            if not fallback:
+                raise
+            self._record_fallback("task", e)
+            return await self.fallback.generate_task(user_profile, category)
+        self._cache_task(key, task)
+        return task
+
+    async def generate_tasks(
         self,
-        conversation_history: list[dict],
-    ) -> dict:
-        """Evaluate conversation depth for effect measurement."""
-        prompt = """以下の会話を分析し、3つの観点でスコアを返してください（JSON形式）:
-
-1. self_disclosure (0.0〜1.0): 自己開示度
-   - 個人的な感情、経験、悩みをどれだけ話したか
-
-2. specificity (0.0〜1.0): 具体性
-   - 抽象的な話から具体的なエピソードに深まったか
-
-3. insight_expression (0.0〜1.0): 気づきの表明
-   - 「分かった」「気づいた」「そうかも」などの発言があるか
-
-会話:
-""" + json.dumps(conversation_history, ensure_ascii=False)
-
+        requests: list[tuple[dict, str]],
+    ) -> list[str | None]:
+        """
+        Generate tasks for many (profile, category) pairs, in order.
+
+        Cache misses are packed TASK_BATCH_SIZE at a time into one JSON-output
+        call; members missing or invalid in the batch response are retried
+        with generate_task. None marks a member that failed both ways; there
+        is no template fallback here, so callers can retry those later.
+        """
+        results: list[str | None] = [None] * len(requests)
+        pending = []
+        for index, (user_profile, category) in enumerate(requests):
+            profile, key = self._task_cache_key(user_profile, category)
+            cached = self._cached_task(key)
+            if cached is not None:
+                results[index] = cached
+            else:
+                pending.append((index, profile, category, key))
+
+        size = settings.TASK_BATCH_SIZE
+        batches = [pending[i : i + size] for i in range(0, len(pending), size)]
+        for batch, tasks in zip(
+            batches,
+            await asyncio.gather(*(self._generate_task_batch(b) for b in batches)),
+            strict=True,
+        ):
+            for (index, _, _, key), task in zip(batch, tasks, strict=True):
+                if task is not None:
+                    self._cache_task(key, task)
+                    results[index] = task
+
+        async def retry(index: int) -> None:
+            try:
+                results[index] = await self.generate_task(
+                    *requests[index], fallback=False
+                )
+            except Exception as e:
+                print(f"Task generation error: {e}")
+
+        await asyncio.gather(
+            *(retry(index) for index, *_ in pending if results[index] is None)
+        )
+        return results
+
+    async def _generate_task_batch(
+        self,
+        batch: list[tuple[int, str, str, str]],
+    ) -> list[str | None]:
+        """One TASK_BATCH call; None for members without a valid task."""
+        prompt = prompts.TASK_BATCH.render(
+            users=prompts.encode_task_batch(
+                [(profile, category) for _, profile, category, _ in batch]
+            )
+        )
+        tasks: list[str | None] = [None] * len(batch)
         try:
-            response = self.model.generate_content(prompt)
-            text = response.text
-            if "```json" in text:
-                text = text.split("```json")[1].split("```")[0]
-            elif "```" in text:
-                text = text.split("```")[1].split("```")[0]
-            return json.loads(text.strip())
+            text = await self._generate(
+                prompt,
+                generation_config={"response_mime_type": "application/json"},
+                operation="task",
+            )
         except Exception as e:
-            print(f"Evaluation error: {e}")
-            return {
-                "self_disclosure": 0.5,
-                "specificity": 0.5,
-                "insight_expression": 0.5,
-            }
+            print(f"Task batch error: {e}")
+            return tasks
+
+        for item in extract_json(text, list) or []:
+            if not isinstance(item, dict):
+                continue
+            number, task = item.get("id"), item.get("task")
+            if (
+                isinstance(number, int)
+                and 1 <= number <= len(batch)
+                and isinstance(task, str)
+                and task.strip()
+            ):
+                tasks[number - 1] = task.strip()
+        return tasks
+
+    def _task_cache_key(self, user_profile: dict, category: str) -> tuple[str, str]:
+        """The normalised, encoded profile and its cache key."""
+        profile = prompts.encode_profile(
+            prompts.quantize_profile(user_profile, settings.TASK_CACHE_QUANTUM)
+        )
+        key = hashlib.sha256(
+            f"{prompts.TASK.version}\0{category}\0{profile}".encode()
+        ).hexdigest()
+        return profile, key
+
+    def _cached_task(self, key: str) -> str | None:
+        return self.task_cache.get(key) if self.task_cache is not None else None
+
+    def _cache_task(self, key: str, task: str) -> None:
+        if self.task_cache is not None and task:
+            self.task_cache.add(key, task)
 
     def _format_messages(
         self,
         conversation_history: list[dict],
-        system_prompt: str,
+        context: str,
     ) -> str:
-        """Format messages for Gemini."""
-        formatted = f"システム: {system_prompt}\n\n"
+        """Format the per-user context and messages for Gemini."""
+        formatted = f"システム: {context.strip()}\n\n"
         for msg in conversation_history:
+            if msg["role"] == SUMMARY_ROLE:
+                formatted += f"これまでの会話の要約: {msg['content']}\n\n"
+                continue
             role = "ユーザー" if msg["role"] == "user" else "アシスタント"
             formatted += f"{role}: {msg['content']}\n"
         formatted += "アシスタント: "
         return formatted
 
-    async def _generate(self, prompt: str) -> str:
-        """Generate response from Gemini."""
-        response = self.model.generate_content(prompt)
-        return response.text
+    def _record_fallback(self, operation: str, error: Exception) -> None:
+        print(f"Gemini {operation} error, serving a template response: {error!r}")
+        self.fallbacks[operation] += 1
+
+    async def _generate(
+        self,
+        prompt: str,
+        model: genai.GenerativeModel | None = None,
+        generation_config: dict | None = None,
+        operation: str = "chat",
+    ) -> str:
+        """Generate response from Gemini without blocking the event loop.
+
+        Retried, hedged and bounded by the operation's deadline; raises
+        CircuitOpenError without calling Gemini while the breaker is open.
+        """
+        model = model or self.model
+
+        async def attempt() -> str:
+            response = await llm_executor.run(
+                lambda: model.generate_content_async(
+                    prompt, generation_config=generation_config
+                )
+            )
+            return response.text
+
+        return await self.resilience.call(
+            operation, attempt, settings.GEMINI_DEADLINE_SECONDS[operation]
+        )
+
+    async def _stream_or_fallback(
+        self,
+        prompt: str,
+        model: genai.GenerativeModel,
+        fallback: Callable[[], AsyncIterator[str]],
+    ) -> AsyncIterator[str]:
+        """Stream from Gemini, or from `fallback` if it fails before any text."""
+        started = False
+        try:
+            async for chunk in self._generate_stream(prompt, model):
+                started = True
+                yield chunk
+        except Exception as e:
+            if started:
+                raise
+            self._record_fallback("chat", e)
+            async for chunk in fallback():
+                yield chunk
+
+    async def _generate_stream(
+        self,
+        prompt: str,
+        model: genai.GenerativeModel | None = None,
+    ) -> AsyncIterator[str]:
+        """Stream response text from Gemini as chunks arrive.
+
+        Waiting for a concurrency slot, opening the stream and receiving its
+        first chunk run as one "chat" operation under the resilience policy
+        (without hedging, which would leave a second stream to close); later
+        chunks each get the executor timeout. The slot is held until the
+        stream is exhausted or the consumer closes the generator (e.g. on
+        client disconnect), at which point the upstream response is closed
+        as well.
+        """
+        model = model or self.model
+
+        async def open_stream() -> tuple[AsyncExitStack, AsyncIterator, object]:
+            slot = AsyncExitStack()
+            await slot.enter_async_context(llm_executor.slot())
+            try:
+                response = await model.generate_content_async(prompt, stream=True)
+                stream = aiter(response)
+                try:
+                    return slot, stream, await anext(stream)
+                except StopAsyncIteration:
+                    return slot, stream, None
+                except BaseException:
+                    await self._close_stream(stream)
+                    raise
+            except BaseException as e:
+                await slot.__aexit__(type(e), e, e.__traceback__)
+                raise
+
+        slot, stream, chunk = await self.resilience.call(
+            "chat",
+            open_stream,
+            settings.GEMINI_DEADLINE_SECONDS["chat"],
+            hedge=False,
+        )
+        async with slot:
+            try:
+                while chunk is not None:
+                    if chunk.text:
+                        yield chunk.text
+                    try:
+                        chunk = await llm_executor.with_timeout(anext(stream))
+                    except StopAsyncIteration:
+                        chunk = None
+            finally:
+                await self._close_stream(stream)
+
+    @staticmethod
+    async def _close_stream(stream: AsyncIterator) -> None:
+        aclose = getattr(stream, "aclose", None)
+        if aclose is not None:
+            await aclose()
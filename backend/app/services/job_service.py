@@ -0,0 +1,143 @@
+import random
+from datetime import timedelta
+from uuid import UUID
+
+from sqlalchemy import case, cast, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.job import Job, JobStatus
+
+
+class JobService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def enqueue(
+        self,
+        kind: str,
+        payload: dict,
+        user_id: UUID | None = None,
+    ) -> Job:
+        """
+        Add a job to the session without committing.
+
+        The job is committed with the caller's transaction, so it exists
+        exactly when the write that triggered it does.
+        """
+        job = Job(
+            user_id=user_id,
+            kind=kind,
+            payload=payload,
+            status=JobStatus.PENDING,
+            attempts=0,
+            max_attempts=settings.JOB_MAX_ATTEMPTS,
+        )
+        self.db.add(job)
+        return job
+
+    async def is_queued(self, kind: str, payload: dict) -> bool:
+        """Whether a pending or running job of `kind` contains `payload`."""
+        result = await self.db.execute(
+            select(Job.id)
+            .where(
+                Job.kind == kind,
+                Job.status.in_([JobStatus.PENDING, JobStatus.RUNNING]),
+                Job.payload.contains(payload),
+            )
+            .limit(1)
+        )
+        return result.first() is not None
+
+    async def get_for_user(self, job_id: UUID, user_id: UUID) -> Job | None:
+        result = await self.db.execute(
+            select(Job).where(Job.id == job_id, Job.user_id == user_id)
+        )
+        return result.scalar_one_or_none()
+
+    async def claim(self) -> Job | None:
+        """Lock the oldest due job for this worker and mark it running."""
+        due = (
+            select(Job.id)
+            .where(Job.status == JobStatus.PENDING, Job.run_at <= func.now())
+            .order_by(Job.run_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        result = await self.db.execute(
+            update(Job)
+            .where(Job.id == due)
+            .values(
+                status=JobStatus.RUNNING,
+                attempts=Job.attempts + 1,
+                locked_at=func.now(),
+            )
+            .returning(Job)
+        )
+        job = result.scalar_one_or_none()
+        await self.db.commit()
+        return job
+
+    async def mark_succeeded(self, job_id: UUID) -> None:
+        await self.db.execute(
+            update(Job)
+            .where(Job.id == job_id)
+            .values(
+                status=JobStatus.SUCCEEDED,
+                locked_at=None,
+                last_error=None,
+                finished_at=func.now(),
+            )
+        )
+        await self.db.commit()
+
+    async def mark_failed(self, job: Job, error: str) -> None:
+        """Reschedule with exponential backoff, or give up after max_attempts."""
+        if job.attempts < job.max_attempts:
+            values = {
+                "status": JobStatus.PENDING,
+                "run_at": func.now() + self.backoff(job.attempts),
+            }
+        else:
+            values = {"status": JobStatus.FAILED, "finished_at": func.now()}
+
+        await self.db.execute(
+            update(Job)
+            .where(Job.id == job.id)
+            .values(locked_at=None, last_error=error[:2000], **values)
+        )
+        await self.db.commit()
+
+    async def requeue_stale(self) -> int:
+        """
+        Return jobs whose worker died mid-run to the queue, or fail them once
+        their attempts are used up (e.g. a job that always hangs).
+        """
+        cutoff = func.now() - timedelta(seconds=settings.JOB_LOCK_TIMEOUT_SECONDS)
+        exhausted = Job.attempts >= Job.max_attempts
+        result = await self.db.execute(
+            update(Job)
+            .where(Job.status == JobStatus.RUNNING, Job.locked_at < cutoff)
+            .values(
+                status=case(
+                    (exhausted, cast(JobStatus.FAILED, Job.status.type)),
+                    else_=cast(JobStatus.PENDING, Job.status.type),
+                ),
+                locked_at=None,
+                run_at=func.now(),
+                finished_at=case((exhausted, func.now()), else_=None),
+                last_error=case(
+                    (exhausted, "Worker lock timed out on the last attempt"),
+                    else_=Job.last_error,
+                ),
+            )
+        )
+        await self.db.commit()
+        return result.rowcount
+
+    @staticmethod
+    def backoff(attempts: int) -> timedelta:
+        """Exponential backoff (capped at an hour) with jitter."""
+        delay = min(settings.JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1), 3600)
+        return timedelta(seconds=delay / 2 + random.uniform(0, delay / 2))
@@ -1,6 +1,10 @@
 """Mock Gemini service for development without API keys."""
 
+import asyncio
 import random
+from collections.abc import AsyncIterator
+
+from app.core.config import settings
 
 
 class MockGeminiService:
@@ -53,9 +57,16 @@ class MockGeminiService:
         ],
     }
 
-    def __init__(self):
-        self._onboarding_index = 0
-        self._daily_index = 0
+    @staticmethod
+    def _turn_index(conversation_history: list[dict]) -> int:
+        # Stateless progression so one instance can serve every user
+        return sum(1 for msg in conversation_history if msg["role"] == "assistant")
+
+    async def close(self) -> None:
+        """Nothing to release for the mock service."""
+
+    def stats(self) -> dict:
+        return {}
 
     async def generate_onboarding_response(
         self,
@@ -65,9 +76,11 @@ class MockGeminiService:
         """Generate mock response for onboarding conversation."""
         # Simple progression through responses
         response = self.ONBOARDING_RESPONSES[
-            min(self._onboarding_index, len(self.ONBOARDING_RESPONSES) - 1)
+            min(
+                self._turn_index(conversation_history),
+                len(self.ONBOARDING_RESPONSES) - 1,
+            )
         ]
-        self._onboarding_index += 1
 
         # Check if onboarding should complete
         if len(conversation_history) >= 8:
@@ -87,15 +100,50 @@ class MockGeminiService:
         )
 
         response = self.DAILY_RESPONSES[
-            min(self._daily_index, len(self.DAILY_RESPONSES) - 1)
+            min(
+                self._turn_index(conversation_history),
+                len(self.DAILY_RESPONSES) - 1,
+            )
         ]
-        self._daily_index += 1
 
         return response.format(task=task_content)
 
+    async def stream_onboarding_response(
+        self,
+        conversation_history: list[dict],
+        user_profile: dict,
+    ) -> AsyncIterator[str]:
+        """Stream mock onboarding response token by token."""
+        response = await self.generate_onboarding_response(
+            conversation_history, user_profile
+        )
+        async for chunk in self._stream(response):
+            yield chunk
+
+    async def stream_daily_coach_response(
+        self,
+        conversation_history: list[dict],
+        user_profile: dict,
+        today_task: dict | None,
+    ) -> AsyncIterator[str]:
+        """Stream mock daily coaching response token by token."""
+        response = await self.generate_daily_coach_response(
+            conversation_history, user_profile, today_task
+        )
+        async for chunk in self._stream(response):
+            yield chunk
+
+    async def _stream(self, text: str) -> AsyncIterator[str]:
+        """Split text into small chunks, sleeping between them like a model."""
+        size = settings.MOCK_STREAM_CHUNK_SIZE
+        for i in range(0, len(text), size):
+            await asyncio.sleep(settings.MOCK_STREAM_TOKEN_DELAY)
+            yield text[i : i + size]
+
     async def analyze_conversation(
         self,
         conversation_history: list[dict],
+        previous: dict | None = None,
     ) -> dict:
         """Return mock analysis results."""
         return {
@@ -113,8 +161,23 @@ class MockGeminiService:
             "values": ["成長", "自由", "誠実さ"],
             "strengths_discovered": ["粘り強さ", "好奇心"],
             "insight": "新しいことに挑戦する意欲がある",
+            "depth": {
+                "self_disclosure": random.uniform(0.4, 0.8),
+                "specificity": random.uniform(0.3, 0.7),
+                "insight_expression": random.uniform(0.3, 0.6),
+            },
         }
 
+    async def summarize_conversation(
+        self,
+        previous_summary: str | None,
+        messages: list[dict],
+    ) -> str:
+        """Return a mock rolling summary built from the user's messages."""
+        said = " / ".join(m["content"][:30] for m in messages if m["role"] == "user")
+        summary = f"{previous_summary} / {said}" if previous_summary else said
+        return summary[-400:]
+
     async def generate_task(
         self,
         user_profile: dict,
@@ -124,13 +187,9 @@ class MockGeminiService:
         tasks = self.TASK_TEMPLATES.get(category, self.TASK_TEMPLATES["lifestyle"])
         return random.choice(tasks)
 
-    async def evaluate_conversation_depth(
+    async def generate_tasks(
         self,
-        conversation_history: list[dict],
-    ) -> dict:
-        """Return mock evaluation results."""
-        return {
-            "self_disclosure": random.uniform(0.4, 0.8),
-            "specificity": random.uniform(0.3, 0.7),
-            "insight_expression": random.uniform(0.3, 0.6),
-        }
+        requests: list[tuple[dict, str]],
+    ) -> list[str | None]:
+        """Generate mock daily tasks, in order."""
+        return [await self.generate_task(*request) for request in requests]
@@ -1,11 +1,46 @@
+import json
+from datetime import date
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import Float, Text, case, column, func, literal, select, update
+from sqlalchemy.dialects.postgresql import JSONB, aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
 
+from app.core.cache import create_cache_backend
+from app.core.config import settings
 from app.models.user_profile import UserProfile
 from app.schemas.profile import UserProfileUpdate
 
+# Existing trait scores keep this weight when merged with a new analysis
+EXISTING_WEIGHT = 0.7
+MAX_CONVERSATION_INSIGHTS = 50
+
+# Columns kept in the cached profile snapshot (everything the API reads)
+SNAPSHOT_COLUMNS = (
+    UserProfile.id,
+    UserProfile.user_id,
+    UserProfile.thinking_style,
+    UserProfile.motivation_drivers,
+    UserProfile.stress_response,
+    UserProfile.behavioral_patterns,
+    UserProfile.values,
+    UserProfile.strengths_discovered,
+    UserProfile.growth_areas,
+    UserProfile.conversation_insights,
+    UserProfile.onboarding_completed,
+    UserProfile.created_at,
+    UserProfile.updated_at,
+)
+
+# Process-wide user_id -> serialised profile snapshot cache
+profile_cache = create_cache_backend(
+    settings.PROFILE_CACHE_URL,
+    max_size=settings.PROFILE_CACHE_SIZE,
+    ttl=settings.PROFILE_CACHE_TTL_SECONDS,
+    prefix="profile:",
+)
+
 
 class ProfileService:
     def __init__(self, db: AsyncSession):
@@ -17,6 +52,30 @@ class ProfileService:
         )
         return result.scalar_one_or_none()
 
+    async def get_snapshot(self, user_id: UUID) -> dict | None:
+        """
+        Read-through cached profile as a plain dict of SNAPSHOT_COLUMNS.
+
+        Every write method below invalidates the entry; the TTL bounds
+        staleness from writers in other processes using a local cache.
+        """
+        cached = await profile_cache.get(str(user_id))
+        if cached is not None:
+            return json.loads(cached)
+
+        result = await self.db.execute(
+            select(*SNAPSHOT_COLUMNS).where(UserProfile.user_id == user_id)
+        )
+        row = result.mappings().one_or_none()
+        if row is None:
+            return None
+
+        snapshot = json.dumps(
+            dict(row), ensure_ascii=False, separators=(",", ":"), default=str
+        )
+        await profile_cache.set(str(user_id), snapshot)
+        return json.loads(snapshot)
+
     async def update(
         self,
         user_id: UUID,
@@ -36,6 +95,7 @@ class ProfileService:
 
         await self.db.commit()
         await self.db.refresh(profile)
+        await profile_cache.delete(str(user_id))
         return profile
 
     async def complete_onboarding(self, user_id: UUID) -> UserProfile | None:
@@ -44,6 +104,7 @@ class ProfileService:
             profile.onboarding_completed = True
             await self.db.commit()
             await self.db.refresh(profile)
+            await profile_cache.delete(str(user_id))
         return profile
 
     async def add_conversation_insight(
@@ -51,93 +112,190 @@ class ProfileService:
         user_id: UUID,
         insight: str,
         context: str,
-    ) -> UserProfile | None:
-        from datetime import date
-
-        profile = await self.get_by_user_id(user_id)
-        if profile:
-            insights = list(profile.conversation_insights or [])
-            insights.append(
-                {
-                    "date": date.today().isoformat(),
-                    "insight": insight,
-                    "context": context,
-                }
-            )
-            # Keep only last 50 insights
-            profile.conversation_insights = insights[-50:]
-            await self.db.commit()
-            await self.db.refresh(profile)
-        return profile
+    ) -> bool:
+        insight_entry = {
+            "date": date.today().isoformat(),
+            "insight": insight,
+            "context": context,
+        }
+        return await self._update_jsonb(
+            user_id,
+            {
+                UserProfile.conversation_insights: _append_trimmed(
+                    UserProfile.conversation_insights,
+                    insight_entry,
+                    MAX_CONVERSATION_INSIGHTS,
+                )
+            },
+        )
 
     async def add_daily_observation(
         self,
         user_id: UUID,
         observation: dict,
-    ) -> UserProfile | None:
-        profile = await self.get_by_user_id(user_id)
-        if profile:
-            buffer = list(profile.daily_observation_buffer or [])
-            buffer.append(observation)
-            profile.daily_observation_buffer = buffer
-            await self.db.commit()
-            await self.db.refresh(profile)
-        return profile
+    ) -> bool:
+        buffer = func.coalesce(UserProfile.daily_observation_buffer, _jsonb([]))
+        return await self._update_jsonb(
+            user_id,
+            {
+                UserProfile.daily_observation_buffer: buffer.concat(
+                    func.jsonb_build_array(_jsonb(observation))
+                )
+            },
+        )
 
-    async def clear_daily_observation_buffer(
-        self,
-        user_id: UUID,
-    ) -> UserProfile | None:
-        profile = await self.get_by_user_id(user_id)
-        if profile:
-            profile.daily_observation_buffer = []
-            await self.db.commit()
-            await self.db.refresh(profile)
-        return profile
+    async def clear_daily_observation_buffer(self, user_id: UUID) -> bool:
+        return await self._update_jsonb(
+            user_id, {UserProfile.daily_observation_buffer: _jsonb([])}
+        )
 
     async def update_profile_from_analysis(
         self,
         user_id: UUID,
         analysis: dict,
-    ) -> UserProfile | None:
-        """Update profile based on AI analysis results."""
-        profile = await self.get_by_user_id(user_id)
-        if profile is None:
-            return None
+    ) -> bool:
+        """
+        Merge AI analysis results into the profile in one UPDATE.
 
-        # Merge thinking_style
-        if "thinking_style" in analysis:
-            current = dict(profile.thinking_style or {})
-            for key, value in analysis["thinking_style"].items():
-                if key in current:
-                    # Weighted average: 70% existing + 30% new
-                    current[key] = current[key] * 0.7 + value * 0.3
-                else:
-                    current[key] = value
-            profile.thinking_style = current
-
-        # Merge motivation_drivers
-        if "motivation_drivers" in analysis:
-            current = dict(profile.motivation_drivers or {})
-            for key, value in analysis["motivation_drivers"].items():
-                if key in current:
-                    current[key] = current[key] * 0.7 + value * 0.3
-                else:
-                    current[key] = value
-            profile.motivation_drivers = current
+        Trait scores are weighted-averaged into the existing ones, keyword
+        lists are unioned. Returns False if there was nothing to merge or the
+        user has no profile.
+        """
+        changes = _analysis_changes(analysis)
+        if not changes:
+            return False
+        return await self._update_jsonb(user_id, changes)
+
+    async def apply_conversation_analysis(
+        self,
+        user_id: UUID,
+        analysis: dict,
+        context: str,
+    ) -> bool:
+        """
+        Merge a conversation's analysis, and its insight, in one UPDATE.
 
-        # Add new values (deduplicated)
-        if "values" in analysis:
-            current_values = set(profile.values or [])
-            current_values.update(analysis["values"])
-            profile.values = list(current_values)
+        Unlike the other writes this does not commit, so it can commit with
+        the caller's other writes; call invalidate() after committing.
+        """
+        changes = _analysis_changes(analysis)
+        if analysis.get("insight"):
+            changes[UserProfile.conversation_insights] = _append_trimmed(
+                UserProfile.conversation_insights,
+                {
+                    "date": date.today().isoformat(),
+                    "insight": analysis["insight"],
+                    "context": context,
+                },
+                MAX_CONVERSATION_INSIGHTS,
+            )
+        if not changes:
+            return False
+        result = await self.db.execute(
+            update(UserProfile)
+            .where(UserProfile.user_id == user_id)
+            .values(changes)
+            .returning(UserProfile.id)
+        )
+        return result.scalar_one_or_none() is not None
 
-        # Add new strengths (deduplicated)
-        if "strengths_discovered" in analysis:
-            current_strengths = set(profile.strengths_discovered or [])
-            current_strengths.update(analysis["strengths_discovered"])
-            profile.strengths_discovered = list(current_strengths)
+    async def invalidate(self, user_id: UUID) -> None:
+        """Drop the cached snapshot after a write committed elsewhere."""
+        await profile_cache.delete(str(user_id))
 
+    async def _update_jsonb(self, user_id: UUID, changes: dict) -> bool:
+        """Apply column expressions to the user's profile row atomically."""
+        result = await self.db.execute(
+            update(UserProfile)
+            .where(UserProfile.user_id == user_id)
+            .values(changes)
+            .returning(UserProfile.id)
+        )
+        updated = result.scalar_one_or_none() is not None
         await self.db.commit()
-        await self.db.refresh(profile)
-        return profile
+        await profile_cache.delete(str(user_id))
+        return updated
+
+
+def _analysis_changes(analysis: dict) -> dict:
+    """Column expressions merging an analysis's traits and keyword lists."""
+    changes = {}
+    for column_ in (UserProfile.thinking_style, UserProfile.motivation_drivers):
+        scores = analysis.get(column_.key)
+        if isinstance(scores, dict):
+            scores = {
+                key: float(value)
+                for key, value in scores.items()
+                if isinstance(value, int | float)
+            }
+            if scores:
+                changes[column_] = _weighted_merge(column_, scores)
+
+    for column_ in (UserProfile.values, UserProfile.strengths_discovered):
+        items = analysis.get(column_.key)
+        if isinstance(items, list) and items:
+            changes[column_] = _union(column_, items)
+    return changes
+
+
+def _jsonb(value) -> ColumnElement:
+    return literal(value, JSONB)
+
+
+def _weighted_merge(column_, scores: dict[str, float]) -> ColumnElement:
+    """column || {key: existing * 0.7 + new * 0.3, or new where absent}."""
+    new = func.jsonb_each(_jsonb(scores)).table_valued(
+        column("key", Text), column("value", JSONB)
+    )
+    current = func.coalesce(column_, _jsonb({}))
+    merged = case(
+        (
+            current.has_key(new.c.key),
+            func.to_jsonb(
+                current[new.c.key].cast(Float) * EXISTING_WEIGHT
+                + new.c.value.cast(Float) * (1 - EXISTING_WEIGHT)
+            ),
+        ),
+        else_=new.c.value,
+    )
+    return current.concat(
+        select(func.coalesce(func.jsonb_object_agg(new.c.key, merged), _jsonb({})))
+        .select_from(new)
+        .scalar_subquery()
+    )
+
+
+def _union(column_, items: list) -> ColumnElement:
+    """column || [new items not already in column], keeping existing order."""
+    new = func.jsonb_array_elements(_jsonb(items)).table_valued(column("value", JSONB))
+    current = func.coalesce(column_, _jsonb([]))
+    added = (
+        select(func.coalesce(func.jsonb_agg(new.c.value.distinct()), _jsonb([])))
+        .select_from(new)
+        .where(~current.contains(func.jsonb_build_array(new.c.value)))
+        .scalar_subquery()
+    )
+    return current.concat(added)
+
+
+def _append_trimmed(column_, item: dict, limit: int) -> ColumnElement:
+    """Append `item` to the JSONB array, keeping only the last `limit`."""
+    current = func.coalesce(column_, _jsonb([]))
+    elements = (
+        func.jsonb_array_elements(current.concat(func.jsonb_build_array(_jsonb(item))))
+        .table_valued(column("value", JSONB), with_ordinality="position")
+        .render_derived()
+    )
+    return (
+        select(
+            func.coalesce(
+                func.jsonb_agg(
+                    aggregate_order_by(elements.c.value, elements.c.position)
+                ),
+                _jsonb([]),
+            )
+        )
+        .select_from(elements)
+        .where(elements.c.position > func.jsonb_array_length(current) + 1 - limit)
+        .scalar_subquery()
+    )
@@ -0,0 +1,281 @@
+"""
+Prompt templates for the Gemini coaching model.
+
+Each template splits a prompt into static instructions, built once at import,
+and a short format string for the per-call values. Profiles and tasks are
+encoded compactly: rounded scores, no JSON indentation, and fields still at
+their defaults (see DEFAULT_PROFILE) left out. Templates count their renders
+and estimated tokens for /metrics, and expose a content-derived `version`
+that changes whenever their text does.
+"""
+
+import hashlib
+import json
+
+from app.services.conversation_context import estimate_tokens
+from app.services.user_service import DEFAULT_PROFILE
+
+
+class PromptTemplate:
+    """Static instructions followed by a format string for dynamic values."""
+
+    def __init__(self, name: str, instructions: str, body: str):
+        self.name = name
+        self.instructions = instructions
+        self.body = body
+        self.version = hashlib.sha256(
+            (instructions + body).encode("utf-8")
+        ).hexdigest()[:12]
+        self.instruction_tokens = estimate_tokens(instructions)
+        self.renders = 0
+        self.total_tokens = 0
+
+    def render_body(self, **values) -> str:
+        """Only the dynamic part, e.g. when the instructions are sent apart."""
+        body = self.body.format(**values)
+        self.renders += 1
+        self.total_tokens += self.instruction_tokens + estimate_tokens(body)
+        return body
+
+    def render(self, **values) -> str:
+        return self.instructions + self.render_body(**values)
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "renders": self.renders,
+            "instruction_tokens": self.instruction_tokens,
+            "avg_tokens": self.total_tokens / self.renders if self.renders else 0.0,
+        }
+
+
+def _compact(value) -> str:
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    if isinstance(value, float):
+        return f"{round(value, 2):g}"
+    if isinstance(value, dict):
+        return ", ".join(f"{key}={_compact(item)}" for key, item in value.items())
+    if isinstance(value, list):
+        return "[" + ", ".join(_compact(item) for item in value) + "]"
+    return str(value)
+
+
+def _without_defaults(value, default):
+    """Drop entries equal to their default, empty ones and None."""
+    if isinstance(value, dict):
+        default = default if isinstance(default, dict) else {}
+        kept = {}
+        for key, item in value.items():
+            item = _without_defaults(item, default.get(key))
+            if item is not None:
+                kept[key] = item
+        return kept or None
+    if value is None or value == default or value in ([], ""):
+        return None
+    return value
+
+
+def encode_profile(profile: dict) -> str:
+    """One `field: key=value, ...` line per non-default profile field."""
+    lines = []
+    for field, value in profile.items():
+        if isinstance(value, bool):
+            # Flags are meaningful either way
+            lines.append(f"{field}: {_compact(value)}")
+            continue
+        value = _without_defaults(value, DEFAULT_PROFILE.get(field))
+        if value is not None:
+            if isinstance(value, list):
+                lines.append(f"{field}: {', '.join(_compact(v) for v in value)}")
+            else:
+                lines.append(f"{field}: {_compact(value)}")
+    return "\n".join(lines) or "未設定"
+
+
+def quantize_profile(profile, quantum: float):
+    """Round scores to `quantum` and sort lists, so near-equal profiles match."""
+    if isinstance(profile, bool):
+        return profile
+    if isinstance(profile, float | int):
+        return round(round(profile / quantum) * quantum, 4)
+    if isinstance(profile, dict):
+        return {key: quantize_profile(value, quantum) for key, value in profile.items()}
+    if isinstance(profile, list):
+        return sorted({str(item) for item in profile})
+    return profile
+
+
+def encode_task(task: dict | None) -> str:
+    if not task:
+        return "未設定"
+    status = "完了" if task.get("completed") else "未完了"
+    return f"{task['content']}（{task['category']}・{status}）"
+
+
+def encode_task_batch(requests: list[tuple[str, str]]) -> str:
+    """Numbered (encoded profile, category) entries for TASK_BATCH."""
+    return "\n\n".join(
+        f"[{number}] カテゴリ: {category}\n{profile}"
+        for number, (profile, category) in enumerate(requests, start=1)
+    )
+
+
+def encode_messages(messages: list[dict]) -> str:
+    return json.dumps(messages, ensure_ascii=False, separators=(",", ":"))
+
+
+PROFILE_RULE = "- プロファイルに無い項目はまだ分かっていない（中立）ものとして扱う\n"
+
+ONBOARDING = PromptTemplate(
+    "onboarding",
+    """あなたは学生向けのAIコーチです。
+フラットで親しみやすい友達のような口調で話してください。
+
+オンボーディングの目的:
+- ユーザーの価値観、興味、ストレス耐性を理解する
+- 10-15分で完了できる自然な会話を行う
+- 質問は選択式と短文を組み合わせる
+
+重要なルール:
+- 他人との比較は絶対にしない
+- 評価や判断をしない
+- 押し付けがましくならない
+- 相手のペースに合わせる
+"""
+    + PROFILE_RULE,
+    """
+現在のユーザープロファイル:
+{profile}
+""",
+)
+
+DAILY_COACH = PromptTemplate(
+    "daily_coach",
+    """あなたは学生向けのAIコーチです。
+フラットで親しみやすい友達のような口調で話してください。
+
+デイリーコーチの目的:
+- 今日の状態確認（気分・余裕度）
+- 昨日の行動の簡単な振り返り
+- 今日やる「1タスク」の確認
+
+重要なルール:
+- 1日5分以内で完結する会話を目指す
+- タスクは「失敗しにくい粒度」に分解されている
+- 未実行でも責めない
+- 「できなかった理由」を分析材料として使う
+"""
+    + PROFILE_RULE,
+    """
+ユーザープロファイル:
+{profile}
+
+今日のタスク:
+{task}
+""",
+)
+
+TASK_RULES = (
+    """ルール:
+- 必ず失敗しにくい粒度に分解する
+- 「英語を30分」ではなく「英単語10個を見る」のように具体的に
+- 5分以内で完了できるタスク
+- ユーザーの特性に合わせてカスタマイズ
+"""
+    + PROFILE_RULE
+)
+
+TASK = PromptTemplate(
+    "task",
+    "ユーザープロファイルに基づいて、今日のタスクを1つ生成してください。\n\n"
+    + TASK_RULES,
+    """
+ユーザープロファイル:
+{profile}
+
+カテゴリ: {category}
+
+タスク内容のみを返してください（説明不要）:""",
+)
+
+TASK_BATCH = PromptTemplate(
+    "task_batch",
+    "以下の各ユーザーについて、そのユーザープロファイルとカテゴリに基づいて"
+    "今日のタスクを1つずつ生成してください。\n\n"
+    + TASK_RULES
+    + """
+出力形式: JSON配列のみを返してください（説明不要）。
+各要素は {"id": ユーザー番号, "task": "タスク内容"} とし、全ユーザー分を含めること。
+""",
+    """
+{users}""",
+)
+
+ANALYSIS = PromptTemplate(
+    "analysis",
+    """以下の新しい会話から、ユーザーの特徴と会話の深さを抽出してJSON形式で返してください。
+これまでの推定がある場合は、それを新しい会話で更新した値を返してください。
+
+分析項目:
+- thinking_style: 思考スタイル
+  - logical_intuitive: 0.0(直感的)〜1.0(論理的)
+  - decisive_deliberate: 0.0(即決型)〜1.0(熟考型)
+  - optimistic_cautious: 0.0(楽観的)〜1.0(慎重派)
+- motivation_drivers: モチベーション源
+  - achievement: 達成感 (0.0〜1.0)
+  - recognition: 承認 (0.0〜1.0)
+  - growth: 成長 (0.0〜1.0)
+  - stability: 安定 (0.0〜1.0)
+- values: 表出された価値観キーワード (配列)
+- strengths_discovered: 発見された強み (配列)
+- insight: この会話から得られた洞察 (文字列)
+- depth: 会話の深さ
+  - self_disclosure (0.0〜1.0): 自己開示度
+    - 個人的な感情、経験、悩みをどれだけ話したか
+  - specificity (0.0〜1.0): 具体性
+    - 抽象的な話から具体的なエピソードに深まったか
+  - insight_expression (0.0〜1.0): 気づきの表明
+    - 「分かった」「気づいた」「そうかも」などの発言があるか
+
+会話から判断できない数値は推測せず null にしてください。
+""",
+    """
+これまでの推定:
+{previous}
+
+新しい会話:
+{conversation}""",
+)
+
+SUMMARY = PromptTemplate(
+    "summary",
+    """以下は学生とAIコーチの会話です。
+これまでの要約と新しいメッセージをまとめて、今後のコーチングに必要な情報
+（ユーザーの状況、感情、価値観、決めたこと）を400字以内の要約にしてください。
+""",
+    """
+これまでの要約:
+{summary}
+
+新しいメッセージ:
+{messages}
+
+要約のみを返してください:""",
+)
+
+TEMPLATES = {
+    template.name: template
+    for template in (
+        ONBOARDING,
+        DAILY_COACH,
+        TASK,
+        TASK_BATCH,
+        ANALYSIS,
+        SUMMARY,
+    )
+}
+
+
+def prompt_stats() -> dict:
+    return {name: template.stats() for name, template in TEMPLATES.items()}
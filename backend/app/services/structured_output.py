@@ -0,0 +1,102 @@
+"""
+Structured (JSON) model output.
+
+Requests carry a Gemini `response_schema` derived from a Pydantic model, with
+every property required, and responses are parsed tolerantly: the first JSON
+value of the expected kind is extracted even when wrapped in code fences,
+prose or trailing text, then validated (and clamped) by the same model. Parse
+and validation failures are counted per parser for /metrics.
+"""
+
+import json
+from typing import Any
+
+from pydantic import BaseModel, ValidationError
+
+_decoder = json.JSONDecoder()
+
+
+def extract_json(text: str, expected: type = dict) -> Any | None:
+    """The first JSON object (or array, with expected=list) in `text`."""
+    opener = "[" if expected is list else "{"
+    index = text.find(opener)
+    while index != -1:
+        try:
+            value, _ = _decoder.raw_decode(text, index)
+        except json.JSONDecodeError:
+            pass
+        else:
+            if isinstance(value, expected):
+                return value
+        index = text.find(opener, index + 1)
+    return None
+
+
+def response_schema(model: type[BaseModel]) -> dict:
+    """Translate a Pydantic model's JSON schema into Gemini's Schema subset."""
+    schema = model.model_json_schema()
+    definitions = schema.get("$defs", {})
+
+    def convert(node: dict) -> dict:
+        if "$ref" in node:
+            return convert(definitions[node["$ref"].rsplit("/", 1)[-1]])
+        if "anyOf" in node:
+            options = [o for o in node["anyOf"] if o.get("type") != "null"]
+            converted = convert(options[0])
+            if len(options) < len(node["anyOf"]):
+                converted["nullable"] = True
+            return converted
+
+        kind = node.get("type", "string")
+        converted = {"type": kind.upper()}
+        if kind == "object":
+            converted["properties"] = {
+                name: convert(child)
+                for name, child in node.get("properties", {}).items()
+            }
+            # Every property must be present (null where the model allows
+            # None): Pydantic only lists fields without defaults as required,
+            # and a left-out field would silently fall back to its default
+            if converted["properties"]:
+                converted["required"] = list(converted["properties"])
+        elif kind == "array":
+            converted["items"] = convert(node.get("items", {}))
+        if "description" in node:
+            converted["description"] = node["description"]
+        return converted
+
+    return convert(schema)
+
+
+class StructuredOutputParser:
+    """Parses model output into `schema`, counting failures."""
+
+    def __init__(self, schema: type[BaseModel]):
+        self.schema = schema
+        self.generation_config = {
+            "response_mime_type": "application/json",
+            "response_schema": response_schema(schema),
+        }
+        self.parsed = 0
+        self.parse_failures = 0
+        self.validation_failures = 0
+
+    def parse(self, text: str) -> BaseModel | None:
+        data = extract_json(text)
+        if data is None:
+            self.parse_failures += 1
+            return None
+        try:
+            result = self.schema.model_validate(data)
+        except ValidationError:
+            self.validation_failures += 1
+            return None
+        self.parsed += 1
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "parsed": self.parsed,
+            "parse_failures": self.parse_failures,
+            "validation_failures": self.validation_failures,
+        }
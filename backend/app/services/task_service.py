@@ -1,16 +1,43 @@
 from datetime import date, datetime, timedelta
-from uuid import UUID
+from uuid import UUID, uuid4
 
-from sqlalchemy import func, select
+from sqlalchemy import CTE, Integer, ScalarSelect, Select, cast, func, select, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.task import ActionLog, DailyTask, TaskCategory
+from app.models.user_progress import UserProgress
+
+# Simple rotation for MVP
+CATEGORY_ROTATION = [
+    TaskCategory.STUDY,
+    TaskCategory.LIFESTYLE,
+    TaskCategory.EXERCISE,
+    TaskCategory.SELF_EXPLORATION,
+]
+
+TASK_PROFILE_FIELDS = (
+    "thinking_style",
+    "motivation_drivers",
+    "behavioral_patterns",
+    "values",
+)
 
 
 class TaskService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
+    @staticmethod
+    def choose_category(task_date: date) -> TaskCategory:
+        """Choose the task category for a day."""
+        return CATEGORY_ROTATION[task_date.day % len(CATEGORY_ROTATION)]
+
+    @staticmethod
+    def task_profile_dict(profile: dict) -> dict:
+        """The subset of a profile snapshot used for task generation."""
+        return {field: profile[field] for field in TASK_PROFILE_FIELDS}
+
     async def get_today_task(self, user_id: UUID) -> DailyTask | None:
         today = date.today()
         result = await self.db.execute(
@@ -28,26 +55,117 @@ class TaskService:
         category: TaskCategory,
         task_date: date | None = None,
     ) -> DailyTask:
-        task = DailyTask(
-            user_id=user_id,
-            content=content,
-            category=category,
-            date=task_date or date.today(),
+        # Lock the counters before the task is added so a first-time rebuild
+        # of the progress row cannot already include it.
+        progress = await self._get_progress_for_update(user_id)
+        task_date = task_date or date.today()
+
+        result = await self.db.execute(
+            insert(DailyTask)
+            .values(
+                id=uuid4(),
+                user_id=user_id,
+                content=content,
+                category=category,
+                date=task_date,
+                completed=False,
+            )
+            .on_conflict_do_nothing(index_elements=[DailyTask.user_id, DailyTask.date])
+            .returning(DailyTask)
         )
-        self.db.add(task)
+        task = result.scalar_one_or_none()
+
+        if task is None:
+            # Another request or the pre-generation job got there first
+            await self.db.commit()
+            result = await self.db.execute(
+                select(DailyTask).where(
+                    DailyTask.user_id == user_id,
+                    DailyTask.date == task_date,
+                )
+            )
+            return result.scalar_one()
+
+        progress.total_tasks += 1
+        self._bump_bucket(progress, task_date, total=1)
+
         await self.db.commit()
-        await self.db.refresh(task)
         return task
 
+    async def bulk_create_tasks(self, tasks: list[dict]) -> int:
+        """
+        Insert many tasks at once, skipping users who already have one that day.
+
+        `tasks` items carry user_id, content, category and date. Progress
+        counters of existing user_progress rows are locked first and bumped
+        in one UPDATE per date; missing rows are built from daily_tasks on
+        first use anyway.
+        Returns the number of tasks inserted.
+        """
+        if not tasks:
+            return 0
+
+        # Lock the counters before adding the tasks, like create_task, and in
+        # user_id order, so concurrent single and bulk inserts cannot deadlock
+        await self.db.execute(
+            select(UserProgress.user_id)
+            .where(UserProgress.user_id.in_({task["user_id"] for task in tasks}))
+            .order_by(UserProgress.user_id)
+            .with_for_update()
+        )
+        result = await self.db.execute(
+            insert(DailyTask)
+            .values([{"id": uuid4(), "completed": False, **task} for task in tasks])
+            .on_conflict_do_nothing(index_elements=[DailyTask.user_id, DailyTask.date])
+            .returning(DailyTask.user_id, DailyTask.date)
+        )
+        inserted: dict[date, list[UUID]] = {}
+        for user_id, task_date in result.all():
+            inserted.setdefault(task_date, []).append(user_id)
+
+        for task_date, user_ids in inserted.items():
+            day = task_date.isoformat()
+            bucket = UserProgress.weekly_buckets[day]
+            await self.db.execute(
+                update(UserProgress)
+                .where(UserProgress.user_id.in_(user_ids))
+                .values(
+                    total_tasks=UserProgress.total_tasks + 1,
+                    weekly_buckets=UserProgress.weekly_buckets.concat(
+                        func.jsonb_build_object(
+                            day,
+                            func.jsonb_build_object(
+                                "completed",
+                                func.coalesce(
+                                    bucket["completed"].astext.cast(Integer), 0
+                                ),
+                                "total",
+                                func.coalesce(bucket["total"].astext.cast(Integer), 0)
+                                + 1,
+                            ),
+                        )
+                    ),
+                )
+            )
+
+        await self.db.commit()
+        return sum(len(user_ids) for user_ids in inserted.values())
+
     async def complete_task(
         self,
         task_id: UUID,
         perceived_load: int,
     ) -> DailyTask | None:
-        result = await self.db.execute(select(DailyTask).where(DailyTask.id == task_id))
+        result = await self.db.execute(
+            select(DailyTask).where(DailyTask.id == task_id).with_for_update()
+        )
         task = result.scalar_one_or_none()
 
         if task:
+            progress = None
+            if not task.completed:
+                progress = await self._get_progress_for_update(task.user_id)
+
             task.completed = True
             task.perceived_load = perceived_load
             task.completed_at = datetime.utcnow()
@@ -61,6 +179,9 @@ class TaskService:
             )
             self.db.add(log)
 
+            if progress is not None:
+                await self._record_completion(progress, task)
+
             await self.db.commit()
             await self.db.refresh(task)
 
@@ -82,83 +203,260 @@ class TaskService:
 
         return task
 
-    async def get_streak_days(self, user_id: UUID) -> int:
-        """Calculate consecutive days of task completion."""
-        today = date.today()
-        streak = 0
-        check_date = today
+    def _islands_cte(self, user_id: UUID, today: date) -> CTE:
+        """
+        Completed days grouped into islands of consecutive dates.
 
-        while True:
-            result = await self.db.execute(
-                select(DailyTask).where(
-                    DailyTask.user_id == user_id,
-                    DailyTask.date == check_date,
-                    DailyTask.completed.is_(True),
+        Consecutive completed dates share the same `day - row_number()` value
+        (gaps-and-islands), exposed as the `grp` column.
+        """
+        completed_days = (
+            select(DailyTask.date.label("day"))
+            .where(
+                DailyTask.user_id == user_id,
+                DailyTask.completed.is_(True),
+                DailyTask.date <= today,
+            )
+            .distinct()
+            .cte("completed_days")
+        )
+        return select(
+            completed_days.c.day,
+            (
+                completed_days.c.day
+                - cast(
+                    func.row_number().over(order_by=completed_days.c.day),
+                    Integer,
                 )
+            ).label("grp"),
+        ).cte("islands")
+
+    def _streak_days_subquery(self, user_id: UUID, today: date) -> ScalarSelect:
+        """
+        Streak length as a scalar subquery.
+
+        The streak is the size of the island holding the latest completed day,
+        provided that day is today or yesterday (an unfinished task today does
+        not break the streak).
+        """
+        islands = self._islands_cte(user_id, today)
+        current_group = (
+            select(islands.c.grp)
+            .where(islands.c.day >= today - timedelta(days=1))
+            .order_by(islands.c.day.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        return (
+            select(func.count())
+            .select_from(islands)
+            .where(islands.c.grp == current_group)
+            .scalar_subquery()
+        )
+
+    def _run_length_subquery(
+        self,
+        user_id: UUID,
+        day: date,
+        today: date,
+    ) -> ScalarSelect:
+        """Length of the run of completed days containing `day`."""
+        islands = self._islands_cte(user_id, today)
+        group = select(islands.c.grp).where(islands.c.day == day).scalar_subquery()
+        return (
+            select(func.count())
+            .select_from(islands)
+            .where(islands.c.grp == group)
+            .scalar_subquery()
+        )
+
+    def _totals_query(self, user_id: UUID) -> Select:
+        return select(
+            func.count(DailyTask.id).label("total_tasks"),
+            func.count(DailyTask.id)
+            .filter(DailyTask.completed.is_(True))
+            .label("total_completed"),
+        ).where(DailyTask.user_id == user_id)
+
+    async def get_progress_stats(self, user_id: UUID) -> dict:
+        """
+        Get streak, totals and weekly stats from the user_progress summary.
+
+        This is a single primary-key lookup; the row is built from
+        daily_tasks the first time it is missing.
+        """
+        progress = await self.db.get(UserProgress, user_id)
+        if progress is None:
+            progress = await self._get_progress_for_update(user_id)
+            await self.db.commit()
+
+        today = date.today()
+        streak_days = progress.current_streak
+        if (
+            progress.last_completed_date is None
+            or progress.last_completed_date < today - timedelta(days=1)
+        ):
+            streak_days = 0
+
+        weekly_stats = []
+        for i in range(7):
+            check_date = today - timedelta(days=6 - i)
+            bucket = progress.weekly_buckets.get(check_date.isoformat(), {})
+            total = bucket.get("total", 0)
+            weekly_stats.append(
+                {
+                    "date": check_date.isoformat(),
+                    "completed": bucket.get("completed", 0),
+                    "total": total if total > 0 else 1,  # Avoid division issues
+                }
             )
-            task = result.scalar_one_or_none()
 
-            if task:
-                streak += 1
-                check_date -= timedelta(days=1)
-            else:
-                # If today's task exists but not completed, don't break yet
-                if check_date == today:
-                    check_date -= timedelta(days=1)
-                    continue
-                break
+        return {
+            "streak_days": streak_days,
+            **self._completion_stats(progress.total_tasks, progress.total_completed),
+            "weekly_stats": weekly_stats,
+        }
+
+    async def rebuild_progress(self, user_id: UUID) -> UserProgress:
+        """Recompute the user_progress row from daily_tasks (repair path)."""
+        progress = await self._get_progress_for_update(user_id)
+        for key, value in (await self._compute_progress(user_id)).items():
+            setattr(progress, key, value)
+
+        await self.db.commit()
+        await self.db.refresh(progress)
+        return progress
+
+    async def _compute_progress(self, user_id: UUID) -> dict:
+        """Derive every user_progress counter from daily_tasks."""
+        today = date.today()
 
-        return streak
+        result = await self.db.execute(self._totals_query(user_id))
+        total_tasks, total_completed = result.one()
 
-    async def get_completion_stats(self, user_id: UUID) -> dict:
-        """Get overall completion statistics."""
-        # Total completed
+        islands = self._islands_cte(user_id, today)
         result = await self.db.execute(
-            select(func.count(DailyTask.id)).where(
-                DailyTask.user_id == user_id,
-                DailyTask.completed.is_(True),
-            )
+            select(func.count(), func.max(islands.c.day))
+            .group_by(islands.c.grp)
+            .order_by(func.max(islands.c.day).desc())
         )
-        total_completed = result.scalar() or 0
+        runs = result.all()
 
-        # Total tasks
         result = await self.db.execute(
-            select(func.count(DailyTask.id)).where(DailyTask.user_id == user_id)
+            select(
+                DailyTask.date,
+                func.count(DailyTask.id),
+                func.count(DailyTask.id).filter(DailyTask.completed.is_(True)),
+            )
+            .where(
+                DailyTask.user_id == user_id,
+                DailyTask.date >= today - timedelta(days=6),
+            )
+            .group_by(DailyTask.date)
         )
-        total_tasks = result.scalar() or 0
-
-        completion_rate = total_completed / total_tasks if total_tasks > 0 else 0
+        buckets = {
+            day.isoformat(): {"completed": completed, "total": total}
+            for day, total, completed in result.all()
+        }
 
         return {
-            "total_completed": total_completed,
-            "total_tasks": total_tasks,
-            "completion_rate": completion_rate,
+            "total_tasks": total_tasks or 0,
+            "total_completed": total_completed or 0,
+            "current_streak": runs[0][0] if runs else 0,
+            "last_completed_date": runs[0][1] if runs else None,
+            "longest_streak": max((length for length, _ in runs), default=0),
+            "weekly_buckets": buckets,
         }
 
-    async def get_weekly_stats(self, user_id: UUID) -> list[dict]:
-        """Get stats for the last 7 days."""
-        today = date.today()
-        stats = []
+    async def _get_progress_for_update(self, user_id: UUID) -> UserProgress:
+        """
+        Lock the user's progress row.
 
-        for i in range(7):
-            check_date = today - timedelta(days=6 - i)
-            result = await self.db.execute(
-                select(DailyTask).where(
-                    DailyTask.user_id == user_id,
-                    DailyTask.date == check_date,
-                )
+        A missing row (new user, or one created before the table existed) is
+        built from daily_tasks first so the counters start out correct.
+        """
+        query = (
+            select(UserProgress)
+            .where(UserProgress.user_id == user_id)
+            .with_for_update()
+        )
+        result = await self.db.execute(query)
+        progress = result.scalar_one_or_none()
+        if progress is None:
+            await self.db.execute(
+                insert(UserProgress)
+                .values(user_id=user_id, **await self._compute_progress(user_id))
+                .on_conflict_do_nothing(index_elements=[UserProgress.user_id])
             )
-            tasks = result.scalars().all()
+            result = await self.db.execute(query)
+            progress = result.scalar_one()
+        return progress
 
-            completed = sum(1 for t in tasks if t.completed)
-            total = len(tasks)
+    async def _record_completion(
+        self,
+        progress: UserProgress,
+        task: DailyTask,
+    ) -> None:
+        """Apply a newly completed task to the locked progress counters."""
+        progress.total_completed += 1
+        self._bump_bucket(progress, task.date, completed=1)
 
-            stats.append(
-                {
-                    "date": check_date.isoformat(),
-                    "completed": completed,
-                    "total": total if total > 0 else 1,  # Avoid division issues
-                }
+        last = progress.last_completed_date
+        if last is None or task.date > last:
+            if last == task.date - timedelta(days=1):
+                progress.current_streak += 1
+            else:
+                progress.current_streak = 1
+            progress.last_completed_date = task.date
+            progress.longest_streak = max(
+                progress.longest_streak, progress.current_streak
+            )
+        elif task.date < last:
+            # A past day was filled in, which may join two runs (the current
+            # one or two older ones); recount the current and the merged run.
+            await self.db.flush()
+            result = await self.db.execute(
+                select(self._streak_days_subquery(task.user_id, last))
+            )
+            progress.current_streak = result.scalar() or 0
+            result = await self.db.execute(
+                select(self._run_length_subquery(task.user_id, task.date, last))
+            )
+            progress.longest_streak = max(
+                progress.longest_streak,
+                progress.current_streak,
+                result.scalar() or 0,
             )
 
-        return stats
+    @staticmethod
+    def _bump_bucket(
+        progress: UserProgress,
+        day: date,
+        completed: int = 0,
+        total: int = 0,
+    ) -> None:
+        """Update a day in the rolling weekly buckets, dropping stale days."""
+        cutoff = (date.today() - timedelta(days=6)).isoformat()
+        buckets = {
+            key: value
+            for key, value in (progress.weekly_buckets or {}).items()
+            if key >= cutoff
+        }
+        if day.isoformat() >= cutoff:
+            bucket = dict(buckets.get(day.isoformat(), {"completed": 0, "total": 0}))
+            bucket["completed"] += completed
+            bucket["total"] += total
+            buckets[day.isoformat()] = bucket
+        progress.weekly_buckets = buckets
+
+    @staticmethod
+    def _completion_stats(total_tasks: int | None, total_completed: int | None) -> dict:
+        total_tasks = total_tasks or 0
+        total_completed = total_completed or 0
+        completion_rate = total_completed / total_tasks if total_tasks > 0 else 0
+
+        return {
+            "total_completed": total_completed,
+            "total_tasks": total_tasks,
+            "completion_rate": completion_rate,
+        }
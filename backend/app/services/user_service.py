@@ -1,21 +1,70 @@
+import copy
 from uuid import UUID
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import TTLCache
+from app.core.config import settings
 from app.models.user import User
 from app.models.user_profile import UserProfile
 
+# Process-wide firebase_uid -> user_id cache
+identity_cache = TTLCache(
+    max_size=settings.IDENTITY_CACHE_SIZE,
+    ttl=settings.IDENTITY_CACHE_TTL_SECONDS,
+)
+
+
+# Starting profile for new users; prompt encoding omits values equal to these
+DEFAULT_PROFILE = {
+    "thinking_style": {
+        "logical_intuitive": 0.5,
+        "decisive_deliberate": 0.5,
+        "optimistic_cautious": 0.5,
+    },
+    "motivation_drivers": {
+        "achievement": 0.5,
+        "recognition": 0.5,
+        "growth": 0.5,
+        "stability": 0.5,
+    },
+    "stress_response": {
+        "pattern": "neutral",
+        "triggers": [],
+        "coping": [],
+    },
+    "behavioral_patterns": {
+        "best_time": "afternoon",
+        "task_preference": "small",
+        "streak_sensitivity": "medium",
+    },
+    "values": [],
+    "strengths_discovered": [],
+    "growth_areas": [],
+    "conversation_insights": [],
+}
+
 
 class UserService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
     async def get_by_firebase_uid(self, firebase_uid: str) -> User | None:
-        result = await self.db.execute(
-            select(User).where(User.firebase_uid == firebase_uid)
-        )
-        return result.scalar_one_or_none()
+        """Look the user up by primary key when the uid has been seen before."""
+        user_id = identity_cache.get(firebase_uid)
+        if user_id is not None:
+            query = select(User).where(User.id == user_id)
+        else:
+            query = select(User).where(User.firebase_uid == firebase_uid)
+
+        result = await self.db.execute(query)
+        user = result.scalar_one_or_none()
+        if user is None:
+            identity_cache.delete(firebase_uid)
+        else:
+            identity_cache.set(firebase_uid, user.id)
+        return user
 
     async def get_by_id(self, user_id: UUID) -> User | None:
         result = await self.db.execute(select(User).where(User.id == user_id))
@@ -36,37 +85,11 @@ class UserService:
         await self.db.flush()
 
         # Create default profile
-        profile = UserProfile(
-            user_id=user.id,
-            thinking_style={
-                "logical_intuitive": 0.5,
-                "decisive_deliberate": 0.5,
-                "optimistic_cautious": 0.5,
-            },
-            motivation_drivers={
-                "achievement": 0.5,
-                "recognition": 0.5,
-                "growth": 0.5,
-                "stability": 0.5,
-            },
-            stress_response={
-                "pattern": "neutral",
-                "triggers": [],
-                "coping": [],
-            },
-            behavioral_patterns={
-                "best_time": "afternoon",
-                "task_preference": "small",
-                "streak_sensitivity": "medium",
-            },
-            values=[],
-            strengths_discovered=[],
-            growth_areas=[],
-            conversation_insights=[],
-        )
+        profile = UserProfile(user_id=user.id, **copy.deepcopy(DEFAULT_PROFILE))
         self.db.add(profile)
         await self.db.commit()
         await self.db.refresh(user)
+        identity_cache.delete(firebase_uid)
 
         return user
 
@@ -87,4 +110,5 @@ class UserService:
             user.fcm_token = fcm_token
             await self.db.commit()
             await self.db.refresh(user)
+            identity_cache.delete(user.firebase_uid)
         return user
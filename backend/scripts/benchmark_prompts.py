@@ -0,0 +1,113 @@
+"""
+Compare prompt size and render time: templates vs. the old JSON rendering.
+
+    python scripts/benchmark_prompts.py
+    python scripts/benchmark_prompts.py --iterations 100000
+
+The "legacy" prompts embed the profile/task with json.dumps(..., indent=2),
+as the f-strings in GeminiService used to.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services import prompts  # noqa: E402
+from app.services.conversation_context import estimate_tokens  # noqa: E402
+
+# A typical profile a few conversations in: some traits learned, some default
+PROFILE = {
+    "thinking_style": {
+        "logical_intuitive": 0.6812345,
+        "decisive_deliberate": 0.5,
+        "optimistic_cautious": 0.4234,
+    },
+    "motivation_drivers": {
+        "achievement": 0.72,
+        "recognition": 0.5,
+        "growth": 0.8812,
+        "stability": 0.5,
+    },
+    "stress_response": {"pattern": "avoidant", "triggers": ["deadline"], "coping": []},
+    "behavioral_patterns": {
+        "best_time": "afternoon",
+        "task_preference": "small",
+        "streak_sensitivity": "medium",
+    },
+    "values": ["自由", "創造性", "誠実さ"],
+    "strengths_discovered": ["傾聴"],
+    "onboarding_completed": True,
+}
+TASK = {"content": "英単語を10個見る", "category": "study", "completed": False}
+
+LEGACY_DAILY = prompts.DAILY_COACH.instructions.replace(prompts.PROFILE_RULE, "")
+LEGACY_TASK = prompts.TASK.instructions.replace(prompts.PROFILE_RULE, "")
+
+
+def legacy_daily() -> str:
+    return (
+        LEGACY_DAILY
+        + "\nユーザープロファイル:\n"
+        + json.dumps(PROFILE, ensure_ascii=False, indent=2)
+        + "\n\n今日のタスク:\n"
+        + json.dumps(TASK, ensure_ascii=False, indent=2)
+        + "\n"
+    )
+
+
+def legacy_task() -> str:
+    return (
+        LEGACY_TASK
+        + "\nユーザープロファイル:\n"
+        + json.dumps(PROFILE, ensure_ascii=False, indent=2)
+        + "\n\nカテゴリ: study\n\nタスク内容のみを返してください（説明不要）:"
+    )
+
+
+def template_daily() -> str:
+    return prompts.DAILY_COACH.render(
+        profile=prompts.encode_profile(PROFILE), task=prompts.encode_task(TASK)
+    )
+
+
+def template_task() -> str:
+    return prompts.TASK.render(
+        profile=prompts.encode_profile(PROFILE), category="study"
+    )
+
+
+def measure(render, iterations: int) -> tuple[int, int, float]:
+    prompt = render()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        render()
+    elapsed = time.perf_counter() - started
+    return (
+        len(prompt.encode("utf-8")),
+        estimate_tokens(prompt),
+        elapsed / iterations * 1e6,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'prompt':<22}{'bytes':>8}{'~tokens':>9}{'us/render':>11}")
+    for name, render in (
+        ("daily_coach legacy", legacy_daily),
+        ("daily_coach template", template_daily),
+        ("task legacy", legacy_task),
+        ("task template", template_task),
+    ):
+        size, tokens, micros = measure(render, args.iterations)
+        print(f"{name:<22}{size:>8}{tokens:>9}{micros:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
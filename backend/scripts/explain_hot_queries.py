@@ -0,0 +1,162 @@
+"""
+Seed a synthetic dataset and print query plans for the hot lookup paths.
+
+Compare plans with and without the hot path indexes:
+
+    alembic upgrade head
+    python scripts/explain_hot_queries.py --seed
+    alembic downgrade d5a0b3c7e914
+    python scripts/explain_hot_queries.py
+    alembic upgrade head
+
+Run against a disposable database only; --seed inserts a lot of rows.
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+from sqlalchemy import text
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.database import engine  # noqa: E402
+
+SEED_SQL = [
+    """
+    INSERT INTO users (id, firebase_uid, is_active)
+    SELECT gen_random_uuid(), 'bench-' || n, true
+    FROM generate_series(1, :users) AS n
+    ON CONFLICT DO NOTHING
+    """,
+    """
+    INSERT INTO daily_tasks (id, user_id, content, category, date, completed)
+    SELECT gen_random_uuid(), u.id, 'task', 'LIFESTYLE',
+           current_date - d, random() < 0.7
+    FROM users u, generate_series(0, :days - 1) AS d
+    WHERE u.firebase_uid LIKE 'bench-%'
+    ON CONFLICT DO NOTHING
+    """,
+    """
+    INSERT INTO conversations (id, user_id, type, created_at, ended_at)
+    SELECT gen_random_uuid(), u.id, 'DAILY',
+           now() - make_interval(days => c),
+           CASE WHEN c = 0 THEN NULL ELSE now() - make_interval(days => c) END
+    FROM users u, generate_series(0, :conversations - 1) AS c
+    WHERE u.firebase_uid LIKE 'bench-%'
+    """,
+    """
+    INSERT INTO messages (id, conversation_id, role, content, created_at)
+    SELECT gen_random_uuid(), c.id,
+           CASE WHEN m % 2 = 0 THEN 'USER'::messagerole
+                ELSE 'ASSISTANT'::messagerole END,
+           'message ' || m, c.created_at + make_interval(secs => m)
+    FROM conversations c, generate_series(1, :messages) AS m
+    """,
+    """
+    INSERT INTO action_logs (id, user_id, task_id, executed, perceived_load, logged_at)
+    SELECT gen_random_uuid(), t.user_id, t.id, t.completed,
+           CASE WHEN t.completed THEN 1 + (random() * 4)::int END,
+           t.date + time '20:00' + make_interval(mins => (random() * 120)::int)
+    FROM daily_tasks t
+    JOIN users u ON u.id = t.user_id
+    WHERE u.firebase_uid LIKE 'bench-%'
+    """,
+    """
+    INSERT INTO coaching_insights
+        (id, insight_type, content, target_profile, context, sample_size, source)
+    SELECT gen_random_uuid(), 'EFFECTIVE_QUESTION',
+           jsonb_build_object('question', 'question ' || n),
+           jsonb_build_object(
+               'thinking_style',
+               (ARRAY['intuitive', 'logical', 'deliberate', 'decisive'])[1 + n % 4],
+               'stress_response',
+               (ARRAY['avoidant', 'active', 'social', 'reflective', 'physical'])
+                   [1 + n % 5]
+           ),
+           'bench', 0, 'LEARNED'
+    FROM generate_series(1, :insights) AS n
+    """,
+    "ANALYZE",
+]
+
+HOT_QUERIES = {
+    "today's task": """
+        SELECT * FROM daily_tasks
+        WHERE user_id = :user_id AND date = current_date
+    """,
+    "completed days (streak islands)": """
+        SELECT DISTINCT date FROM daily_tasks
+        WHERE user_id = :user_id AND completed IS true AND date <= current_date
+    """,
+    "active conversation": """
+        SELECT * FROM conversations
+        WHERE user_id = :user_id AND type = 'DAILY' AND ended_at IS NULL
+        ORDER BY created_at DESC
+    """,
+    "recent messages": """
+        SELECT role, content FROM messages
+        WHERE conversation_id = (
+            SELECT id FROM conversations WHERE user_id = :user_id LIMIT 1
+        )
+        ORDER BY created_at DESC LIMIT 18
+    """,
+    "action logs": """
+        SELECT * FROM action_logs WHERE user_id = :user_id
+        ORDER BY logged_at DESC LIMIT 30
+    """,
+    "insights for profile": """
+        SELECT id FROM coaching_insights
+        WHERE target_profile @> '{"thinking_style": "intuitive"}'
+    """,
+}
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seed", action="store_true")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=120)
+    parser.add_argument("--conversations", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--insights", type=int, default=20000)
+    args = parser.parse_args()
+
+    try:
+        async with engine.begin() as conn:
+            if args.seed:
+                params = {
+                    "users": args.users,
+                    "days": args.days,
+                    "conversations": args.conversations,
+                    "messages": args.messages,
+                    "insights": args.insights,
+                }
+                for statement in SEED_SQL:
+                    await conn.execute(text(statement), params)
+
+            user_id = (
+                await conn.execute(
+                    text(
+                        "SELECT id FROM users WHERE firebase_uid LIKE 'bench-%' "
+                        "ORDER BY firebase_uid LIMIT 1"
+                    )
+                )
+            ).scalar_one()
+
+            for name, query in HOT_QUERIES.items():
+                result = await conn.execute(
+                    text(f"EXPLAIN (ANALYZE, BUFFERS) {query}"),
+                    {"user_id": user_id},
+                )
+                print(f"=== {name}")
+                for (line,) in result:
+                    print(line)
+                print()
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
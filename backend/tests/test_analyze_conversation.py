@@ -0,0 +1,90 @@
+from datetime import UTC, datetime
+from uuid import uuid4
+
+import pytest
+
+from app.jobs.handlers import analyze_conversation
+from app.models.conversation import Conversation, ConversationType
+from app.services import ConversationService, ProfileService
+
+ANALYSIS = {"values": ["成長"], "insight": "挑戦したい"}
+
+
+class FakeSession:
+    def __init__(self, conversation: Conversation):
+        self.conversation = conversation
+        self.commits = 0
+
+    async def get(self, model, key):
+        return self.conversation
+
+    async def commit(self) -> None:
+        self.commits += 1
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    """Stub the services' queries, recording the writes they would make."""
+    calls: dict[str, list] = {"merged": [], "depth": []}
+
+    async def analyze_new_messages(self, conversation, gemini_service):
+        return conversation.analysis
+
+    async def mark_analysis_applied(self, conversation):
+        return True
+
+    async def record_depth_score(self, conversation, depth):
+        calls["depth"].append(depth)
+        return 1
+
+    async def apply_conversation_analysis(self, user_id, analysis, context):
+        calls["merged"].append(analysis)
+        return True
+
+    async def invalidate(self, user_id):
+        return None
+
+    monkeypatch.setattr(
+        ConversationService, "analyze_new_messages", analyze_new_messages
+    )
+    monkeypatch.setattr(
+        ConversationService, "mark_analysis_applied", mark_analysis_applied
+    )
+    monkeypatch.setattr(ConversationService, "record_depth_score", record_depth_score)
+    monkeypatch.setattr(
+        ProfileService, "apply_conversation_analysis", apply_conversation_analysis
+    )
+    monkeypatch.setattr(ProfileService, "invalidate", invalidate)
+    return calls
+
+
+def ended_conversation(analysis: dict) -> Conversation:
+    return Conversation(
+        id=uuid4(),
+        user_id=uuid4(),
+        type=ConversationType.DAILY,
+        ended_at=datetime.now(UTC),
+        analysis=analysis,
+    )
+
+
+async def test_analysis_without_depth_records_no_depth_score(recorded):
+    conversation = ended_conversation(ANALYSIS)
+    db = FakeSession(conversation)
+
+    await analyze_conversation(db, {"conversation_id": str(conversation.id)}, None)
+
+    assert recorded["merged"] == [ANALYSIS]
+    assert recorded["depth"] == []
+    assert db.commits == 1
+
+
+async def test_analysis_with_depth_records_it(recorded):
+    depth = {"self_disclosure": 0.8, "specificity": 0.6}
+    conversation = ended_conversation({**ANALYSIS, "depth": depth})
+
+    await analyze_conversation(
+        FakeSession(conversation), {"conversation_id": str(conversation.id)}, None
+    )
+
+    assert recorded["depth"] == [depth]
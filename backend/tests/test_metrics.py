@@ -0,0 +1,13 @@
+import httpx
+
+from app.main import app
+
+
+async def test_metrics_without_lifespan():
+    # ASGITransport does not run the lifespan, so no GeminiService exists yet
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert {"llm", "admission", "db", "gemini"} <= response.json().keys()
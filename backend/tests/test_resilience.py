@@ -0,0 +1,264 @@
+import asyncio
+
+import pytest
+
+from app.core.resilience import CircuitBreaker, CircuitOpenError, ResilientCaller
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def make_breaker(clock, **overrides) -> CircuitBreaker:
+    options = {
+        "window": 10,
+        "min_calls": 4,
+        "failure_rate": 0.5,
+        "slow_call_seconds": 5.0,
+        "open_seconds": 30.0,
+    }
+    options.update(overrides)
+    return CircuitBreaker(**options, clock=clock)
+
+
+def make_caller(clock, breaker=None, **overrides) -> ResilientCaller:
+    options = {"retries": 0, "retry_base": 0.001}
+    options.update(overrides)
+    return ResilientCaller(breaker or make_breaker(clock), **options, clock=clock)
+
+
+def test_breaker_stays_closed_below_min_calls(clock):
+    breaker = make_breaker(clock)
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record(False, 0.1)
+
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_trips_at_failure_rate(clock):
+    breaker = make_breaker(clock)
+    for ok in (True, False, True, False):
+        breaker.allow()
+        breaker.record(ok, 0.1)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.stats()["trips"] == 1
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_breaker_counts_slow_calls_as_failures(clock):
+    breaker = make_breaker(clock)
+    for _ in range(4):
+        breaker.allow()
+        breaker.record(True, 5.0)
+
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_breaker_lets_one_probe_through_after_open_seconds(clock):
+    breaker = make_breaker(clock, min_calls=1)
+    breaker.allow()
+    breaker.record(False, 0.1)
+
+    clock.advance(29.9)
+    assert not breaker.allow()
+    clock.advance(0.1)
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+
+
+def test_successful_probe_closes_the_breaker(clock):
+    breaker = make_breaker(clock, min_calls=1)
+    breaker.allow()
+    breaker.record(False, 0.1)
+    clock.advance(30)
+
+    assert breaker.allow()
+    breaker.record(True, 0.1)
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens_the_breaker(clock):
+    breaker = make_breaker(clock, min_calls=1)
+    breaker.allow()
+    breaker.record(False, 0.1)
+    clock.advance(30)
+
+    assert breaker.allow()
+    breaker.record(False, 0.1)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.stats()["trips"] == 2
+    clock.advance(29)
+    assert not breaker.allow()
+
+
+def test_released_probe_allows_another(clock):
+    breaker = make_breaker(clock, min_calls=1)
+    breaker.allow()
+    breaker.record(False, 0.1)
+    clock.advance(30)
+
+    assert breaker.allow()
+    breaker.release()
+
+    assert breaker.allow()
+
+
+async def test_call_retries_upstream_failures(clock):
+    caller = make_caller(clock, retries=2)
+    attempts = 0
+
+    async def flaky():
+        nonlocal attempts
+        attempts += 1
+        if attempts < 3:
+            raise ConnectionError("reset")
+        return "ok"
+
+    assert await caller.call("op", flaky, deadline=10) == "ok"
+    assert caller.stats()["operations"]["op"]["retries"] == 2
+
+
+async def test_call_fails_fast_while_open(clock):
+    breaker = make_breaker(clock, min_calls=1)
+    caller = make_caller(clock, breaker=breaker, retries=2)
+    attempts = 0
+
+    async def down():
+        nonlocal attempts
+        attempts += 1
+        raise ConnectionError("refused")
+
+    with pytest.raises(CircuitOpenError):
+        await caller.call("op", down, deadline=10)
+    assert attempts == 1
+    assert caller.stats()["operations"]["op"]["rejected"] == 1
+
+
+async def test_non_failures_are_not_retried_or_counted(clock):
+    breaker = make_breaker(clock, min_calls=1)
+    caller = make_caller(
+        clock,
+        breaker=breaker,
+        retries=2,
+        is_failure=lambda error: not isinstance(error, ValueError),
+    )
+    attempts = 0
+
+    async def blocked():
+        nonlocal attempts
+        attempts += 1
+        raise ValueError("response was blocked")
+
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            await caller.call("op", blocked, deadline=10)
+
+    assert attempts == 3
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert caller.stats()["operations"]["op"]["not_retried"] == 3
+
+
+async def test_non_failure_releases_a_half_open_probe(clock):
+    breaker = make_breaker(clock, min_calls=1)
+    breaker.allow()
+    breaker.record(False, 0.1)
+    clock.advance(30)
+    caller = make_caller(clock, breaker=breaker, is_failure=lambda error: False)
+
+    async def invalid():
+        raise ValueError("invalid argument")
+
+    with pytest.raises(ValueError):
+        await caller.call("op", invalid, deadline=10)
+
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+
+
+async def warm_up(caller, clock, latency: float, samples: int) -> None:
+    async def quick():
+        clock.advance(latency)
+        return "warm"
+
+    for _ in range(samples):
+        await caller.call("op", quick, deadline=10)
+
+
+async def test_hedge_starts_after_p95_and_first_success_wins(clock):
+    caller = make_caller(clock, hedge=True, hedge_min_samples=5)
+    await warm_up(caller, clock, latency=0.01, samples=5)
+    stuck = asyncio.Event()
+    cancelled = False
+    attempts = 0
+
+    async def slow_then_fast():
+        nonlocal attempts, cancelled
+        attempts += 1
+        if attempts == 1:
+            try:
+                await stuck.wait()
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+        return f"attempt {attempts}"
+
+    assert await caller.call("op", slow_then_fast, deadline=10) == "attempt 2"
+    await asyncio.sleep(0.01)  # let the losing attempt's cancellation land
+
+    assert caller.stats()["operations"]["op"]["hedges"] == 1
+    assert cancelled
+
+
+async def test_no_hedge_without_enough_samples(clock):
+    caller = make_caller(clock, hedge=True, hedge_min_samples=5)
+    await warm_up(caller, clock, latency=0.01, samples=4)
+    attempts = 0
+
+    async def slow():
+        nonlocal attempts
+        attempts += 1
+        await asyncio.sleep(0.05)
+        return "slow"
+
+    assert await caller.call("op", slow, deadline=10) == "slow"
+    assert attempts == 1
+    assert caller.stats()["operations"]["op"]["hedges"] == 0
+
+
+async def test_hedge_keeps_first_error_over_rejected_hedge(clock):
+    breaker = make_breaker(clock, min_calls=100)
+    caller = make_caller(clock, breaker=breaker, hedge=True, hedge_min_samples=5)
+    await warm_up(caller, clock, latency=0.01, samples=5)
+    fail = asyncio.Event()
+
+    async def first_fails_late():
+        # The breaker opens while the first attempt runs, rejecting the hedge
+        breaker._trip()
+        await fail.wait()
+        raise ConnectionError("reset")
+
+    task = asyncio.ensure_future(caller.call("op", first_fails_late, deadline=10))
+    await asyncio.sleep(0.05)
+    fail.set()
+
+    with pytest.raises(ConnectionError):
+        await task
@@ -0,0 +1,81 @@
+from pydantic import BaseModel
+
+from app.schemas.profile import ConversationAnalysis
+from app.services.structured_output import (
+    StructuredOutputParser,
+    extract_json,
+    response_schema,
+)
+
+
+class Inner(BaseModel):
+    score: float = 0.5
+    label: str | None = None
+
+
+class Outer(BaseModel):
+    name: str
+    tags: list[str] = []
+    inner: Inner = Inner()
+    optional_inner: Inner | None = None
+
+
+def test_response_schema_requires_every_property():
+    schema = response_schema(Outer)
+
+    assert schema["required"] == ["name", "tags", "inner", "optional_inner"]
+    assert schema["properties"]["inner"]["required"] == ["score", "label"]
+    assert schema["properties"]["optional_inner"]["nullable"] is True
+    assert schema["properties"]["optional_inner"]["required"] == ["score", "label"]
+
+
+def test_response_schema_converts_types():
+    schema = response_schema(Outer)
+
+    assert schema["type"] == "OBJECT"
+    assert schema["properties"]["name"] == {"type": "STRING"}
+    assert schema["properties"]["tags"] == {
+        "type": "ARRAY",
+        "items": {"type": "STRING"},
+    }
+    assert schema["properties"]["inner"]["properties"]["label"] == {
+        "type": "STRING",
+        "nullable": True,
+    }
+
+
+def test_extract_json_skips_prose_and_fences():
+    text = 'Sure! ```json\n{"name": "a", "tags": ["x"]}\n``` hope that helps {'
+
+    assert extract_json(text) == {"name": "a", "tags": ["x"]}
+    assert extract_json("no json here") is None
+
+
+def test_parser_counts_failures():
+    parser = StructuredOutputParser(Outer)
+
+    assert parser.parse('{"name": "a"}').name == "a"
+    assert parser.parse("not json") is None
+    assert parser.parse('{"tags": []}') is None
+    assert parser.stats() == {
+        "parsed": 1,
+        "parse_failures": 1,
+        "validation_failures": 1,
+    }
+
+
+def test_analysis_without_depth_records_no_depth_score():
+    parser = StructuredOutputParser(ConversationAnalysis)
+
+    analysis = parser.parse('{"values": ["成長"], "insight": "挑戦したい"}')
+
+    assert analysis.depth is None
+    assert "depth" not in analysis.model_dump(exclude_none=True)
+
+
+def test_partial_depth_keeps_only_measured_scores():
+    parser = StructuredOutputParser(ConversationAnalysis)
+
+    analysis = parser.parse('{"depth": {"self_disclosure": 0.8, "specificity": null}}')
+
+    assert analysis.model_dump(exclude_none=True)["depth"] == {"self_disclosure": 0.8}
@@ -0,0 +1,139 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import UTC, date, datetime
+from uuid import uuid4
+
+import httpx
+import pytest
+
+from app.api import tasks
+from app.api.deps import get_current_db_user, get_gemini_service, limit_caller
+from app.core.database import get_db
+from app.main import app
+from app.models.task import DailyTask
+from app.models.user import User
+from app.services import ProfileService, TaskService
+from app.services.mock_gemini_service import MockGeminiService
+from app.services.task_service import TASK_PROFILE_FIELDS
+
+CONCURRENT_REQUESTS = 20
+
+
+class FakeSession:
+    """Request session stand-in tracking whether a transaction is open."""
+
+    def __init__(self):
+        self.in_transaction = False
+
+    def begin_read(self) -> None:
+        self.in_transaction = True
+
+    async def commit(self) -> None:
+        self.in_transaction = False
+
+
+class CountingGeminiService(MockGeminiService):
+    """Mock model that counts generations and takes a while to answer."""
+
+    def __init__(self):
+        super().__init__()
+        self.generations = 0
+        self.request_sessions: list[FakeSession] = []
+        self.open_transactions = 0
+
+    async def generate_task(self, user_profile: dict, category: str) -> str:
+        self.generations += 1
+        self.open_transactions = max(
+            self.open_transactions,
+            sum(session.in_transaction for session in self.request_sessions),
+        )
+        await asyncio.sleep(0.05)
+        return await super().generate_task(user_profile, category)
+
+
+@pytest.fixture
+def task_table(monkeypatch):
+    """daily_tasks in memory, unique on (user_id, date) like the real table."""
+    rows: dict[tuple, DailyTask] = {}
+
+    async def get_today_task(self, user_id):
+        if self.db is not None:
+            self.db.begin_read()
+        return rows.get((user_id, date.today()))
+
+    async def create_task(self, user_id, content, category, task_date=None):
+        key = (user_id, task_date or date.today())
+        if key not in rows:
+            rows[key] = DailyTask(
+                id=uuid4(),
+                user_id=user_id,
+                content=content,
+                category=category,
+                date=key[1],
+                completed=False,
+                created_at=datetime.now(UTC),
+            )
+        return rows[key]
+
+    async def get_snapshot(self, user_id):
+        self.db.begin_read()
+        return dict.fromkeys(TASK_PROFILE_FIELDS)
+
+    @asynccontextmanager
+    async def session():
+        yield None
+
+    monkeypatch.setattr(TaskService, "get_today_task", get_today_task)
+    monkeypatch.setattr(TaskService, "create_task", create_task)
+    monkeypatch.setattr(ProfileService, "get_snapshot", get_snapshot)
+    monkeypatch.setattr(tasks, "AsyncSessionLocal", session)
+    return rows
+
+
+@pytest.fixture
+def gemini_service():
+    service = CountingGeminiService()
+    user = User(id=uuid4(), firebase_uid="test-user")
+
+    async def request_session():
+        session = FakeSession()
+        service.request_sessions.append(session)
+        yield session
+
+    async def no_limit():
+        return None
+
+    app.dependency_overrides[get_current_db_user] = lambda: user
+    app.dependency_overrides[get_db] = request_session
+    app.dependency_overrides[get_gemini_service] = lambda: service
+    app.dependency_overrides[limit_caller] = no_limit
+    yield service
+    app.dependency_overrides.clear()
+
+
+async def test_concurrent_misses_generate_one_task(task_table, gemini_service):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        responses = await asyncio.gather(
+            *(client.get("/api/tasks/today") for _ in range(CONCURRENT_REQUESTS))
+        )
+
+    assert [response.status_code for response in responses] == [
+        200
+    ] * CONCURRENT_REQUESTS
+    assert len({response.json()["id"] for response in responses}) == 1
+    assert gemini_service.generations == 1
+    assert len(task_table) == 1
+    # Waiting requests hold no connection while the task is generated
+    assert gemini_service.open_transactions == 0
+
+
+async def test_existing_task_is_not_regenerated(task_table, gemini_service):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        first = await client.get("/api/tasks/today")
+        second = await client.get("/api/tasks/today")
+
+    assert first.json()["id"] == second.json()["id"]
+    assert gemini_service.generations == 1
+    assert len(task_table) == 1